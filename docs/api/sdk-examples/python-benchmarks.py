@@ -0,0 +1,520 @@
+"""
+FlowForge API - Python SDK Benchmarks
+
+Offline throughput benchmarks for the client in python-examples.py. A local
+stand-in server is generated from openapi.yaml, with configurable latency,
+error rates and 429 injection (including X-RateLimit-* headers), so runs are
+reproducible without network access or an API key.
+
+Usage:
+    python python-benchmarks.py --output results.json
+    python python-benchmarks.py --baseline baseline.json --max-regression 0.2
+
+Results are written as JSON; with --baseline the script exits non-zero when
+any benchmark's throughput drops by more than --max-regression, so CI can
+gate on it. Throughput on shared CI runners is noisy, so pass --report-only
+there to list regressions without failing the build.
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import hmac
+import importlib.util
+import json
+import logging
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Any, Callable, Tuple
+from urllib.parse import urlparse, parse_qs
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+OPENAPI_PATH = os.path.join(HERE, '..', 'openapi.yaml')
+
+
+def load_sdk():
+    """Import python-examples.py, whose file name is not a valid module name."""
+    spec = importlib.util.spec_from_file_location('flowforge_examples', os.path.join(HERE, 'python-examples.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Mock Server
+
+def example_from_schema(schema: Dict[str, Any], spec: Dict[str, Any], depth: int = 0) -> Any:
+    """Build an example value for an OpenAPI schema."""
+    if depth > 8:
+        return None
+    if '$ref' in schema:
+        name = schema['$ref'].split('/')[-1]
+        return example_from_schema(spec['components']['schemas'][name], spec, depth + 1)
+    if 'allOf' in schema:
+        merged = {}
+        for part in schema['allOf']:
+            merged.update(example_from_schema(part, spec, depth + 1) or {})
+        return merged
+    if 'example' in schema:
+        return schema['example']
+    if 'enum' in schema:
+        return schema['enum'][0]
+
+    schema_type = schema.get('type', 'object')
+    if schema_type == 'object':
+        return {name: example_from_schema(prop, spec, depth + 1)
+                for name, prop in schema.get('properties', {}).items()}
+    if schema_type == 'array':
+        return [example_from_schema(schema.get('items', {}), spec, depth + 1)]
+    if schema_type == 'integer':
+        return 1
+    if schema_type == 'number':
+        return 1.0
+    if schema_type == 'boolean':
+        return True
+    if schema.get('format') == 'date-time':
+        return '2024-01-15T16:45:00Z'
+    return 'string'
+
+
+# Endpoints the client uses that are documented in the markdown guides
+# but not (yet) in openapi.yaml
+SUPPLEMENTAL_RESPONSES = {
+    ('POST', '/flows/{flow_id}/messages/bulk'): {
+        'batch_id': 'batch_123', 'status': 'processing', 'total_messages': 0, 'messages': []
+    },
+    ('POST', '/flows/{flow_id}/simulate'): {
+        'simulation_id': 'sim_789', 'results': [], 'summary': {'final_status': 'success'}
+    },
+    ('GET', '/flows/{flow_id}/analytics'): {
+        'summary': {'total_messages': 100, 'success_rate': 98.5, 'total_cost': 4.5,
+                    'avg_cost_per_message': 0.045},
+        'vendor_breakdown': []
+    },
+    ('GET', '/vendors'): {'data': [], 'pagination': {'has_more': False, 'next_cursor': None}},
+    ('GET', '/vendors/{vendor_id}/health'): {'vendor_id': 'twilio', 'status': 'healthy', 'metrics': {}},
+}
+
+
+class MockServerConfig:
+    """Behaviour knobs for the stand-in server."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: int = 0, rate_window: float = 1.0, page_items: int = 1000,
+                 seed: int = 42):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit  # Requests per window; 0 disables 429 injection
+        self.rate_window = rate_window
+        self.page_items = page_items  # Items behind each paginated listing
+        self.random = random.Random(seed)
+
+
+class MockFlowForgeServer:
+    """Threaded HTTP stand-in for the FlowForge API, routed from openapi.yaml."""
+
+    def __init__(self, config: MockServerConfig, openapi_path: str = OPENAPI_PATH):
+        import yaml
+
+        with open(openapi_path) as f:
+            spec = yaml.safe_load(f)
+
+        self.config = config
+        self.routes = []  # (method, compiled path regex, response body, paginated)
+        responses = dict(SUPPLEMENTAL_RESPONSES)
+        paginated = set()
+
+        for path, operations in spec.get('paths', {}).items():
+            for method, operation in operations.items():
+                params = {p.get('name') for p in operation.get('parameters', [])}
+                if 'cursor' in params:
+                    paginated.add((method.upper(), path))
+                for code in ('200', '201'):
+                    content = operation.get('responses', {}).get(code, {}).get('content', {})
+                    schema = content.get('application/json', {}).get('schema')
+                    if schema:
+                        responses[(method.upper(), path)] = example_from_schema(schema, spec)
+                        break
+                else:
+                    responses.setdefault((method.upper(), path), {})
+
+        for (method, path), body in responses.items():
+            pattern = re.compile('^' + re.sub(r'\{[^}]+\}', '[^/]+', path) + '$')
+            self.routes.append((method, pattern, body, (method, path) in paginated))
+        # Literal paths win over templated ones (e.g. /users/invite vs /users/{user_id})
+        self.routes.sort(key=lambda r: r[1].pattern.count('[^/]+'))
+
+        self._lock = threading.Lock()
+        self._window_start = time.time()
+        self._window_count = 0
+        self.requests_served = 0
+        self.rate_limited = 0
+        self.errors_injected = 0
+        self._server = None
+
+    def _rate_limit_headers(self) -> Tuple[bool, Dict[str, str]]:
+        """Advance the fixed rate-limit window; returns (limited, headers)."""
+        config = self.config
+        with self._lock:
+            self.requests_served += 1
+            now = time.time()
+            if now - self._window_start >= config.rate_window:
+                self._window_start, self._window_count = now, 0
+            self._window_count += 1
+            limit = config.rate_limit or 1_000_000
+            remaining = max(0, limit - self._window_count)
+            reset = math.ceil(self._window_start + config.rate_window)
+            limited = bool(config.rate_limit) and self._window_count > limit
+
+        return limited, {
+            'X-RateLimit-Limit': str(limit),
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Reset': str(reset)
+        }
+
+    def respond(self, method: str, raw_path: str, body: bytes,
+                content_encoding: Optional[str] = None) -> Tuple[int, Dict[str, str], Any]:
+        """Compute the status, headers and JSON body for one request."""
+        config = self.config
+        if config.latency or config.jitter:
+            time.sleep(config.latency + config.random.random() * config.jitter)
+
+        limited, headers = self._rate_limit_headers()
+        if limited:
+            with self._lock:
+                self.rate_limited += 1
+            return 429, headers, {'error': {'code': 'RATE_LIMIT_EXCEEDED', 'message': 'Rate limit exceeded'}}
+        if config.error_rate and config.random.random() < config.error_rate:
+            with self._lock:
+                self.errors_injected += 1
+            return 500, headers, {'error': {'code': 'INTERNAL_ERROR', 'message': 'Injected failure'}}
+
+        url = urlparse(raw_path)
+        path = url.path[len('/v1'):] if url.path.startswith('/v1') else url.path
+        for route_method, pattern, template, paginated in self.routes:
+            if route_method == method and pattern.match(path):
+                break
+        else:
+            return 404, headers, {'error': {'code': 'RESOURCE_NOT_FOUND', 'message': path}}
+
+        if paginated:
+            return 200, headers, self._page(template, parse_qs(url.query))
+        if path.endswith('/messages/bulk'):
+            if content_encoding == 'gzip':
+                body = gzip.decompress(body)
+            messages = json.loads(body or b'{}').get('messages', [])
+            return 200, headers, dict(template, total_messages=len(messages), messages=[
+                {'message_id': f'msg_{i}', 'recipient': m.get('recipient'), 'status': 'queued'}
+                for i, m in enumerate(messages)
+            ])
+        return 200, headers, template
+
+    def _page(self, template: Dict[str, Any], query: Dict[str, List[str]]) -> Dict[str, Any]:
+        offset = int(query.get('cursor', ['0'])[0])
+        limit = int(query.get('limit', ['20'])[0])
+        end = min(offset + limit, self.config.page_items)
+        item = (template.get('data') or [{}])[0]
+        return {
+            'data': [dict(item, id=f'item_{i}', message_id=f'msg_{i}') for i in range(offset, end)],
+            'pagination': {
+                'has_more': end < self.config.page_items,
+                'next_cursor': str(end) if end < self.config.page_items else None,
+                'total_count': self.config.page_items
+            }
+        }
+
+    def start(self) -> str:
+        """Serve in a background thread and return the base URL."""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+            def log_message(self, *args):
+                pass
+
+            def handle_any(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                status, headers, payload = mock.respond(self.command, self.path, self.rfile.read(length),
+                                                       self.headers.get('Content-Encoding'))
+                data = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = handle_any
+
+        ThreadingHTTPServer.daemon_threads = True
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+# Benchmark Harness
+
+def _percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(name: str, concurrency: int, operations: int,
+            run: Callable[[Callable[[Callable[[], Any]], None]], None]) -> Dict[str, Any]:
+    """Time a benchmark body that reports each operation through ``timed``."""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def timed(operation: Callable[[], Any]):
+        started = time.perf_counter()
+        try:
+            operation()
+        except Exception:
+            with lock:
+                errors[0] += 1
+        with lock:
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    run(timed)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "name": name,
+        "concurrency": concurrency,
+        "operations": operations,
+        "seconds": round(elapsed, 4),
+        "ops_per_sec": round(operations / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+        "errors": errors[0]
+    }
+
+
+def _fan_out(concurrency: int, count: int, task: Callable[[int], None]):
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(task, range(count)))
+
+
+def bench_send_message(sdk, base_url: str, concurrency: int, count: int) -> Dict[str, Any]:
+    client = sdk.FlowForgeClient('bench-token', base_url, pool_maxsize=concurrency)
+    message = {'recipient': '+1234567890', 'message': {'text': 'Benchmark'}}
+    return measure('send_message', concurrency, count, lambda timed: _fan_out(
+        concurrency, count, lambda i: timed(lambda: client.send_message('flow_123', message))))
+
+
+def bench_send_bulk(sdk, base_url: str, concurrency: int, count: int,
+                    batch_size: int = 100) -> Dict[str, Any]:
+    client = sdk.FlowForgeClient('bench-token', base_url, pool_maxsize=concurrency)
+    messages = ({'recipient': f'+1{i:010d}', 'message': {'text': 'Benchmark'}} for i in range(count))
+
+    def run(timed):
+        timed(lambda: client.send_bulk('flow_123', messages, batch_size=batch_size,
+                                       concurrency=concurrency))
+
+    result = measure('send_bulk_messages', concurrency, count, run)
+    result['unit'] = 'messages'
+    return result
+
+
+def bench_send_bulk_encoded(sdk, base_url: str, concurrency: int, count: int,
+                            batch_size: int = 100) -> Dict[str, Any]:
+    client = sdk.FlowForgeClient('bench-token', base_url, pool_maxsize=concurrency)
+    encoder = sdk.BulkPayloadBuilder(message={'template_id': 'bench_template'}, variables=('name',),
+                                     metadata={'campaign_id': 'BENCH'}, metadata_fields=('customer_id',))
+    rows = ((f'+1{i:010d}', f'Customer {i}', f'cust_{i}') for i in range(count))
+
+    def run(timed):
+        timed(lambda: client.send_bulk('flow_123', rows, batch_size=batch_size,
+                                       concurrency=concurrency, encoder=encoder))
+
+    result = measure('send_bulk_encoded', concurrency, count, run)
+    result['unit'] = 'messages'
+    return result
+
+
+def bench_pagination(sdk, base_url: str, concurrency: int, count: int) -> Dict[str, Any]:
+    client = sdk.FlowForgeClient('bench-token', base_url)
+
+    def run(timed):
+        timed(lambda: sum(1 for _ in client.iter_flow_messages('flow_123', limit=100)))
+
+    result = measure('paginated_listing', 1, count, run)
+    result['unit'] = 'items'
+    return result
+
+
+def bench_status_polling(sdk, base_url: str, concurrency: int, count: int) -> Dict[str, Any]:
+    client = sdk.FlowForgeClient('bench-token', base_url, pool_maxsize=concurrency)
+    return measure('status_polling', concurrency, count, lambda timed: _fan_out(
+        concurrency, count, lambda i: timed(lambda: client.get_message_status(f'msg_{i}'))))
+
+
+def bench_status_polling_async(sdk, base_url: str, concurrency: int, count: int) -> Optional[Dict[str, Any]]:
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        return None
+
+    latencies = []
+    errors = 0
+
+    async def poll():
+        async with sdk.AsyncFlowForgeClient('bench-token', base_url, max_connections=concurrency) as client:
+            async def one(i):
+                nonlocal errors
+                started = time.perf_counter()
+                try:
+                    await client.get_message_status(f'msg_{i}')
+                except Exception:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+            await asyncio.gather(*(one(i) for i in range(count)))
+
+    started = time.perf_counter()
+    asyncio.run(poll())
+    elapsed = time.perf_counter() - started
+    return {
+        "name": "status_polling_async",
+        "concurrency": concurrency,
+        "operations": count,
+        "seconds": round(elapsed, 4),
+        "ops_per_sec": round(count / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 3),
+        "errors": errors
+    }
+
+
+def bench_webhook_verification(sdk, concurrency: int, count: int) -> Dict[str, Any]:
+    secret = 'bench-secret'
+    payload = json.dumps({'event': 'message.delivered', 'data': {'message_id': 'msg_789'}}).encode('utf-8')
+    signature = 'sha256=' + hmac.new(secret.encode('utf-8'), payload, hashlib.sha256).hexdigest()
+    verifier = sdk.WebhookSignatureVerifier(secret)
+
+    def run(timed):
+        def verify(i):
+            if not verifier.verify(payload, signature):
+                raise ValueError("Signature mismatch")
+        _fan_out(concurrency, count, lambda i: timed(lambda: verify(i)))
+
+    return measure('webhook_verification', concurrency, count, run)
+
+
+def run_benchmarks(config: MockServerConfig, concurrency_levels: List[int],
+                   operations: int) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    sdk = load_sdk()
+    server = MockFlowForgeServer(config)
+    base_url = server.start()
+    results = []
+
+    try:
+        for concurrency in concurrency_levels:
+            results.append(bench_send_message(sdk, base_url, concurrency, operations))
+            results.append(bench_send_bulk(sdk, base_url, concurrency, operations * 10))
+            results.append(bench_send_bulk_encoded(sdk, base_url, concurrency, operations * 10))
+            results.append(bench_status_polling(sdk, base_url, concurrency, operations))
+            async_result = bench_status_polling_async(sdk, base_url, concurrency, operations)
+            if async_result:
+                results.append(async_result)
+            results.append(bench_webhook_verification(sdk, concurrency, operations * 10))
+        results.append(bench_pagination(sdk, base_url, 1, config.page_items))
+    finally:
+        server.stop()
+
+    return results, {
+        "requests_served": server.requests_served,
+        "rate_limited": server.rate_limited,
+        "errors_injected": server.errors_injected
+    }
+
+
+def compare_to_baseline(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+                        max_regression: float) -> List[str]:
+    """List benchmarks whose throughput fell more than ``max_regression`` below baseline."""
+    previous = {(r['name'], r['concurrency']): r for r in baseline}
+    regressions = []
+    for result in results:
+        base = previous.get((result['name'], result['concurrency']))
+        if not base or not base['ops_per_sec']:
+            continue
+        change = result['ops_per_sec'] / base['ops_per_sec'] - 1
+        if change < -max_regression:
+            regressions.append(f"{result['name']} @ {result['concurrency']}: "
+                               f"{base['ops_per_sec']} -> {result['ops_per_sec']} ops/s ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the FlowForge Python SDK against a local mock server")
+    parser.add_argument('--concurrency', default='1,8,32', help="Comma-separated concurrency levels")
+    parser.add_argument('--operations', type=int, default=500, help="Operations per benchmark")
+    parser.add_argument('--latency', type=float, default=0.005, help="Mock server latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Extra random latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests failing with 500")
+    parser.add_argument('--rate-limit', type=int, default=0, help="Requests per window before 429s (0 = off)")
+    parser.add_argument('--rate-window', type=float, default=1.0, help="Rate-limit window in seconds")
+    parser.add_argument('--page-items', type=int, default=2000, help="Items behind each paginated listing")
+    parser.add_argument('--output', help="Write results JSON to this file")
+    parser.add_argument('--baseline', help="Baseline results JSON to compare against")
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help="Allowed throughput drop versus baseline (0.2 = 20%%)")
+    parser.add_argument('--report-only', action='store_true',
+                        help="Print regressions versus --baseline but always exit 0")
+    args = parser.parse_args()
+
+    logging.getLogger('flowforge').setLevel(logging.ERROR)
+    config = MockServerConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                              rate_limit=args.rate_limit, rate_window=args.rate_window,
+                              page_items=args.page_items)
+    levels = [int(level) for level in args.concurrency.split(',')]
+    results, server_stats = run_benchmarks(config, levels, args.operations)
+
+    report = {
+        "generated_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "config": {k: v for k, v in vars(args).items() if k not in ('output', 'baseline', 'report_only')},
+        "server": server_stats,
+        "results": results
+    }
+
+    for result in results:
+        print(f"{result['name']:<24} c={result['concurrency']:<4} {result['ops_per_sec']:>12,.1f} ops/s  "
+              f"p50={result['p50_ms']:.2f}ms p95={result['p95_ms']:.2f}ms errors={result['errors']}")
+    print(f"Server: {server_stats['requests_served']} requests, {server_stats['rate_limited']} rate limited, "
+          f"{server_stats['errors_injected']} injected errors")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(results, json.load(f)['results'], args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        sys.exit(1 if regressions and not args.report_only else 0)
+
+
+if __name__ == "__main__":
+    main()
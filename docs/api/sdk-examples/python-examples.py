@@ -7,132 +7,3328 @@ best practices for integration.
 """
 
 import requests
+import asyncio
+import csv
+import gzip
 import json
+import logging
+import os
 import time
 import hmac
 import hashlib
-from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+import http.cookiejar
+import math
+import mmap
+import operator
+import queue
+import random
+import re
+import sqlite3
+import struct
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import groupby, islice
+from typing import Dict, List, Optional, Any, Callable, Iterable, Iterator, Tuple
+from datetime import datetime, timedelta, timezone
+
+try:
+    import orjson
+except ImportError:  # Optional; bulk payloads fall back to the stdlib encoder
+    orjson = None
+
+
+logger = logging.getLogger('flowforge')
+
+# Retry policy shared by the sync and async clients
+MAX_ATTEMPTS = 3
+
+
+def _rate_limit_wait(headers) -> int:
+    """Seconds until the rate-limit window in a 429 response resets."""
+    reset_time = int(headers.get('X-RateLimit-Reset', 0))
+    return max(0, reset_time - int(time.time()))
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter, so retrying callers spread out."""
+    return random.uniform(0, 2.0 ** attempt)
+
+
+def _json_bytes(value: Any) -> bytes:
+    """Compact UTF-8 JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Lazily split any iterable into lists of at most ``size`` items."""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+@dataclass
+class BulkSendResult:
+    """Outcome of a pipelined bulk send, with one entry per batch."""
+    batches: List[Dict[str, Any]] = field(default_factory=list)
+    accepted: int = 0
+    rejected: int = 0
+    failed: int = 0
+    skipped: int = 0  # Messages in batches a journal had already committed
+
+    @property
+    def batch_ids(self) -> List[str]:
+        """Server-assigned batch IDs, in submission order."""
+        ordered = sorted(self.batches, key=lambda b: (b.get('shard', 0), b.get('task', 0), b['index']))
+        return [b['batch_id'] for b in ordered if b['batch_id']]
+
+    @property
+    def failed_batches(self) -> List[Dict[str, Any]]:
+        """Batches that still failed after all retries."""
+        return [b for b in self.batches if b['error']]
+
+    def record_batch(self, index: int, size: int, attempts: int, response: Dict[str, Any]):
+        """Record a batch the API accepted, counting per-message rejections."""
+        statuses = response.get('messages')
+        if statuses is None:
+            accepted = response.get('total_messages', size)
+        else:
+            accepted = sum(1 for m in statuses if m.get('status') not in ('failed', 'rejected'))
+        
+        self.accepted += accepted
+        self.rejected += size - accepted
+        self.batches.append({
+            "index": index,
+            "batch_id": response.get('batch_id'),
+            "accepted": accepted,
+            "rejected": size - accepted,
+            "attempts": attempts,
+            "error": None
+        })
+
+    def record_failure(self, index: int, size: int, attempts: int, error: Exception):
+        """Record a batch that could not be submitted."""
+        self.failed += size
+        self.batches.append({
+            "index": index,
+            "batch_id": None,
+            "accepted": 0,
+            "rejected": 0,
+            "attempts": attempts,
+            "error": str(error)
+        })
+
+    def merge(self, other: 'BulkSendResult', **labels):
+        """Fold in another result (e.g. one shard's), tagging its batches with ``labels``."""
+        self.accepted += other.accepted
+        self.rejected += other.rejected
+        self.failed += other.failed
+        self.skipped += other.skipped
+        self.batches.extend(dict(batch, **labels) for batch in other.batches)
+
+
+class BulkPayloadBuilder:
+    """Encode bulk-send bodies from columnar recipient rows.
+    
+    Fields every message shares (template, default variables, campaign
+    metadata) are serialized once up front; each row only contributes its
+    recipient followed by the ``variables`` and ``metadata_fields`` columns,
+    in that order. Bodies keep the documented ``{"messages": [...]}`` shape
+    and are gzipped as they are encoded unless ``compress_level`` is 0.
+    """
+    
+    def __init__(self, message: Dict[str, Any], variables: Iterable[str] = (),
+                 metadata: Optional[Dict[str, Any]] = None, metadata_fields: Iterable[str] = (),
+                 compress_level: int = 1):
+        variables, metadata_fields = tuple(variables), tuple(metadata_fields)
+        message = dict(message)
+        shared_variables = {k: v for k, v in message.pop('variables', {}).items() if k not in variables}
+        shared_metadata = {k: v for k, v in (metadata or {}).items() if k not in metadata_fields}
+        
+        self.columns = ('recipient',) + variables + metadata_fields
+        self.compress_level = compress_level
+        
+        # Static fragments interleaved with the encoded column values of each row
+        message_head = _json_bytes(message)[:-1] + (b',' if message else b'')
+        fragments = [b'{"recipient":', b',"message":']
+        
+        def append_object(shared: Dict[str, Any], keys: Tuple[str, ...]):
+            head, *rest = self._object_fragments(shared, keys)
+            fragments[-1] += head
+            fragments.extend(rest)
+        
+        if variables or shared_variables:
+            fragments[-1] += message_head + b'"variables":'
+            append_object(shared_variables, variables)
+            fragments[-1] += b'}'
+        else:
+            fragments[-1] += _json_bytes(message)
+        if metadata_fields or shared_metadata:
+            fragments[-1] += b',"metadata":'
+            append_object(shared_metadata, metadata_fields)
+        fragments[-1] += b'}'
+        self._fragments = fragments
+    
+    @staticmethod
+    def _object_fragments(shared: Dict[str, Any], keys: Tuple[str, ...]) -> List[bytes]:
+        """Split an object with trailing per-row ``keys`` into static fragments."""
+        head = _json_bytes(shared)[:-1]
+        fragments = [head]
+        for i, key in enumerate(keys):
+            separator = b',' if shared or i else b''
+            fragments[-1] += separator + _json_bytes(key) + b':'
+            fragments.append(b'')
+        fragments[-1] += b'}'
+        return fragments
+    
+    @property
+    def content_encoding(self) -> Optional[str]:
+        return 'gzip' if self.compress_level else None
+    
+    def encode_row(self, row: Tuple[Any, ...]) -> bytes:
+        """Encode one recipient row as a bulk message object."""
+        if len(row) != len(self.columns):
+            raise ValueError(f"Expected {len(self.columns)} columns {self.columns}, got {len(row)}")
+        fragments = self._fragments
+        parts = [fragments[0]]
+        for value, fragment in zip(row, fragments[1:]):
+            parts.append(_json_bytes(value))
+            parts.append(fragment)
+        return b''.join(parts)
+    
+    def encode(self, rows: Iterable[Tuple[Any, ...]], options: Optional[Dict[str, Any]] = None) -> bytes:
+        """Stream rows into a (compressed) bulk request body."""
+        compressor = zlib.compressobj(self.compress_level, zlib.DEFLATED, 31) if self.compress_level else None
+        chunks = []
+        
+        def emit(data: bytes):
+            chunks.append(compressor.compress(data) if compressor else data)
+        
+        emit(b'{"messages":[')
+        for i, row in enumerate(rows):
+            emit(b',' + self.encode_row(row) if i else self.encode_row(row))
+        emit(b']' + (b',"options":' + _json_bytes(options) if options else b'') + b'}')
+        if compressor:
+            chunks.append(compressor.flush())
+        return b''.join(chunks)
+
+
+class CampaignJournal:
+    """Durable SQLite record of a bulk campaign, for crash-safe resumes.
+    
+    Each batch is journaled with its recipient range and idempotency key
+    before it is sent, and marked committed (with the returned batch_id)
+    once the API accepts it. Re-running the same campaign against the
+    journal skips committed batches without encoding or sending them and
+    resends anything else under its original idempotency key, so a batch
+    that was in flight when the process died is not delivered twice.
+    """
+    
+    def __init__(self, path: str, campaign_id: str):
+        self.campaign_id = campaign_id
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS campaigns (
+                campaign_id TEXT PRIMARY KEY,
+                batch_size INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS batches (
+                campaign_id TEXT NOT NULL,
+                batch_index INTEGER NOT NULL,
+                range_start INTEGER NOT NULL,
+                range_end INTEGER NOT NULL,
+                source_offset INTEGER,
+                idempotency_key TEXT NOT NULL,
+                state TEXT NOT NULL,
+                batch_id TEXT,
+                accepted INTEGER,
+                error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (campaign_id, batch_index)
+            );
+        """)
+        self.batch_size = None
+        self._committed = set()
+        self._checkpoints = {}
+    
+    def start(self, batch_size: int):
+        """Register the campaign, or check a resumed one uses the same batching."""
+        row = self.connection.execute('SELECT batch_size FROM campaigns WHERE campaign_id = ?',
+                                      (self.campaign_id,)).fetchone()
+        if row is None:
+            with self.connection:
+                self.connection.execute('INSERT INTO campaigns VALUES (?, ?, ?)',
+                                        (self.campaign_id, batch_size, time.time()))
+        elif row[0] != batch_size:
+            raise ValueError(f"Campaign {self.campaign_id} was journaled with batch_size={row[0]}, "
+                             f"not {batch_size}; resuming would misalign recipient ranges")
+        
+        self.batch_size = batch_size
+        self._committed = {index for (index,) in self.connection.execute(
+            "SELECT batch_index FROM batches WHERE campaign_id = ? AND state = 'committed'",
+            (self.campaign_id,))}
+    
+    def pending_batches(self, messages: Iterable[Any], batch_size: int) -> Iterator[Tuple[int, List[Any]]]:
+        """Yield ``(index, batch)`` for batches not yet committed, skipping the rest.
+        
+        Sources with ``checkpoint()``/``resume()`` (such as RecipientFile)
+        jump straight past the committed prefix of the campaign instead of
+        reading through it.
+        """
+        self.start(batch_size)
+        resumable = hasattr(messages, 'checkpoint') and hasattr(messages, 'resume')
+        index = 0
+        if resumable:
+            index, checkpoint = self._resume_point()
+            if checkpoint is None:
+                index = 0
+            else:
+                messages.resume(checkpoint)
+        
+        iterator = iter(messages)
+        while True:
+            if index in self._committed:
+                # Consume the batch in C without materializing it
+                if next(islice(iterator, batch_size - 1, batch_size), None) is None:
+                    return
+            else:
+                batch = list(islice(iterator, batch_size))
+                if not batch:
+                    return
+                if resumable:
+                    self._checkpoints[index] = messages.checkpoint()
+                yield index, batch
+            index += 1
+    
+    def _resume_point(self) -> Tuple[int, Optional[int]]:
+        """Index just past the committed prefix, and the source checkpoint there."""
+        prefix = 0
+        while prefix in self._committed:
+            prefix += 1
+        if prefix == 0:
+            return 0, None
+        row = self.connection.execute(
+            'SELECT source_offset FROM batches WHERE campaign_id = ? AND batch_index = ?',
+            (self.campaign_id, prefix - 1)).fetchone()
+        return prefix, row[0]
+    
+    @property
+    def committed_messages(self) -> int:
+        row = self.connection.execute(
+            "SELECT COALESCE(SUM(range_end - range_start), 0) FROM batches "
+            "WHERE campaign_id = ? AND state = 'committed'", (self.campaign_id,)).fetchone()
+        return row[0]
+    
+    def begin(self, index: int, size: int) -> str:
+        """Journal a batch as in flight and return its idempotency key."""
+        row = self.connection.execute(
+            'SELECT idempotency_key FROM batches WHERE campaign_id = ? AND batch_index = ?',
+            (self.campaign_id, index)).fetchone()
+        if row is not None:
+            return row[0]
+        
+        start = index * self.batch_size
+        key = hashlib.sha256(f"{self.campaign_id}:{start}:{start + size}".encode('utf-8')).hexdigest()[:32]
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO batches (campaign_id, batch_index, range_start, range_end, source_offset, "
+                "idempotency_key, state, updated_at) VALUES (?, ?, ?, ?, ?, ?, 'in_flight', ?)",
+                (self.campaign_id, index, start, start + size, self._checkpoints.pop(index, None),
+                 key, time.time()))
+        return key
+    
+    def commit(self, index: int, response: Dict[str, Any]):
+        """Mark a batch as accepted by the API."""
+        with self.connection:
+            self.connection.execute(
+                "UPDATE batches SET state = 'committed', batch_id = ?, accepted = ?, error = NULL, "
+                "updated_at = ? WHERE campaign_id = ? AND batch_index = ?",
+                (response.get('batch_id'), response.get('total_messages'), time.time(),
+                 self.campaign_id, index))
+        self._committed.add(index)
+    
+    def fail(self, index: int, error: Exception):
+        """Mark a batch as failed; a resume resends it under the same key."""
+        with self.connection:
+            self.connection.execute(
+                "UPDATE batches SET state = 'failed', error = ?, updated_at = ? "
+                "WHERE campaign_id = ? AND batch_index = ?",
+                (str(error), time.time(), self.campaign_id, index))
+    
+    def progress(self) -> Dict[str, int]:
+        """Number of journaled batches in each state."""
+        return dict(self.connection.execute(
+            'SELECT state, COUNT(*) FROM batches WHERE campaign_id = ? GROUP BY state',
+            (self.campaign_id,)).fetchall())
+    
+    def close(self):
+        self.connection.close()
+
+
+class RecipientFile:
+    """Memory-mapped CSV or NDJSON recipient list, parsed lazily.
+    
+    Iterating yields one tuple per line, laid out as ``columns``:
+    the recipient, then each variable, then each metadata field, ready for
+    a BulkPayloadBuilder from ``builder()``. ``variables`` and ``metadata``
+    map output names to source columns (a plain sequence keeps the names);
+    empty or missing values fall back to ``defaults``. Only the pages being
+    parsed are resident, so memory stays flat for any file size.
+    
+    ``checkpoint()`` returns the byte offset after the last row read and
+    ``resume(offset)`` restarts iteration there, which is how
+    CampaignJournal skips the already-sent part of a file on a resume.
+    """
+    
+    def __init__(self, path: str, recipient: str = 'phone',
+                 variables: Any = (), metadata: Any = (),
+                 defaults: Optional[Dict[str, Any]] = None, fmt: Optional[str] = None):
+        def mapping(fields):
+            return dict(fields) if isinstance(fields, dict) else {name: name for name in fields}
+        
+        self.path = path
+        self.fmt = fmt or ('ndjson' if path.endswith(('.ndjson', '.jsonl')) else 'csv')
+        self.variables = mapping(variables)
+        self.metadata = mapping(metadata)
+        self.columns = ('recipient',) + tuple(self.variables) + tuple(self.metadata)
+        self._sources = (recipient,) + tuple(self.variables.values()) + tuple(self.metadata.values())
+        self._defaults = tuple((defaults or {}).get(name) for name in self.columns)
+        
+        self._file = open(path, 'rb')
+        self._mmap = b''
+        try:
+            if os.path.getsize(path):
+                self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            if hasattr(self._mmap, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+            
+            self._data_start = 0
+            if self.fmt == 'csv':
+                header_end = self._mmap.find(b'\n')
+                header_end = len(self._mmap) if header_end < 0 else header_end + 1
+                header = next(csv.reader([self._mmap[:header_end].decode('utf-8-sig')]), [])
+                missing = [column for column in self._sources if column not in header]
+                if missing:
+                    raise ValueError(f"{path} has no column(s) {missing}")
+                self._indexes = [header.index(column) for column in self._sources]
+                self._data_start = header_end
+        except BaseException:
+            self.close()
+            raise
+        
+        self.start_offset = self._data_start
+        self.offset = self._data_start
+    
+    def builder(self, message: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None,
+                compress_level: int = 1) -> BulkPayloadBuilder:
+        """A BulkPayloadBuilder whose columns match this file's rows."""
+        return BulkPayloadBuilder(message, variables=self.variables, metadata=metadata,
+                                  metadata_fields=self.metadata, compress_level=compress_level)
+    
+    def checkpoint(self) -> int:
+        return self.offset
+    
+    def resume(self, offset: int):
+        self.start_offset = max(offset, self._data_start)
+    
+    def _lines(self) -> Iterator[str]:
+        data, pos, size = self._mmap, self.start_offset, len(self._mmap)
+        while pos < size:
+            end = data.find(b'\n', pos)
+            end = size if end < 0 else end + 1
+            line = data[pos:end].decode('utf-8')
+            pos = self.offset = end
+            yield line
+    
+    def __iter__(self) -> Iterator[Tuple[Any, ...]]:
+        self.offset = self.start_offset
+        defaults = self._defaults
+        
+        if self.fmt == 'csv':
+            indexes = self._indexes
+            # csv pulls one more line only for quoted multi-line fields, so
+            # ``offset`` always ends exactly at the last row returned
+            for record in csv.reader(self._lines()):
+                if not record:
+                    continue
+                yield tuple(record[i] if i < len(record) and record[i] != '' else default
+                            for i, default in zip(indexes, defaults))
+        else:
+            loads = orjson.loads if orjson is not None else json.loads
+            sources = self._sources
+            for line in self._lines():
+                if not line.strip():
+                    continue
+                record = loads(line)
+                yield tuple(value if value not in (None, '') else default
+                            for value, default in zip(map(record.get, sources), defaults))
+    
+    def close(self):
+        if isinstance(self._mmap, mmap.mmap):
+            self._mmap.close()
+        self._file.close()
+    
+    def __enter__(self) -> 'RecipientFile':
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class RateLimiter:
+    """Client-side GCRA limiter paced by the API's X-RateLimit-* headers.
+    
+    Every response updates the pacing so the remaining quota is spread
+    evenly until the window resets. ``reserve`` never blocks; it returns how
+    long the caller should wait, so one limiter can be shared by threads
+    (``time.sleep``) and asyncio tasks (``asyncio.sleep``) alike.
+    """
+    
+    def __init__(self, burst: int = 1):
+        self.burst = max(1, burst)
+        self._lock = threading.Lock()
+        self._interval = 0.0  # Seconds between requests; 0 until the first response
+        self._tat = 0.0       # Theoretical arrival time of the next request (monotonic)
+
+    def reserve(self) -> float:
+        """Claim the next request slot and return the delay before using it."""
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now)
+            delay = max(0.0, tat - self._interval * (self.burst - 1) - now)
+            self._tat = tat + self._interval
+            return delay
+
+    def update(self, headers) -> None:
+        """Re-pace from the rate-limit headers of a response."""
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset = headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+        
+        window = max(0.0, int(reset) - time.time())
+        remaining = int(remaining)
+        
+        with self._lock:
+            now = time.monotonic()
+            if remaining <= 0:
+                # Quota exhausted: hold every caller until the window resets
+                self._tat = max(self._tat, now + window)
+            else:
+                self._interval = window / remaining
+
+
+class SharedRateLimiter(RateLimiter):
+    """RateLimiter whose pacing state lives in shared memory.
+    
+    Worker processes that inherit one instance (e.g. through a process
+    pool initializer) draw from a single budget, so sharding a campaign
+    across processes does not multiply the request rate.
+    """
+    
+    def __init__(self, burst: int = 1):
+        import multiprocessing
+        
+        self.burst = max(1, burst)
+        self._lock = multiprocessing.Lock()
+        self._state = multiprocessing.RawArray('d', 2)  # interval, TAT (CLOCK_MONOTONIC is system-wide)
+
+    @property
+    def _interval(self) -> float:
+        return self._state[0]
+
+    @_interval.setter
+    def _interval(self, value: float):
+        self._state[0] = value
+
+    @property
+    def _tat(self) -> float:
+        return self._state[1]
+
+    @_tat.setter
+    def _tat(self, value: float):
+        self._state[1] = value
+
+
+class ResponseCache:
+    """Thread-safe LRU cache for GET responses with per-endpoint TTLs.
+    
+    Entries are evicted least-recently-used once ``max_entries`` is reached.
+    With ``revalidate`` enabled, expired entries that carry an ETag are
+    refreshed with ``If-None-Match`` instead of being refetched in full.
+    Cached values are shared between callers and should be treated as
+    read-only.
+    """
+    
+    DEFAULT_TTLS = {
+        'flow': 30.0,
+        'vendors': 60.0,
+        'vendor_health': 5.0
+    }
+    
+    def __init__(self, max_entries: int = 1024, ttls: Optional[Dict[str, float]] = None,
+                 revalidate: bool = True):
+        self.max_entries = max_entries
+        self.ttls = dict(self.DEFAULT_TTLS, **(ttls or {}))
+        self.revalidate = revalidate
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self._entries = OrderedDict()  # key -> (expires_at, etag, value)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(endpoint: str, params: Optional[Dict[str, Any]] = None) -> Tuple:
+        """Build a cache key from an endpoint and its query parameters."""
+        return (endpoint, tuple(sorted((params or {}).items())))
+
+    def lookup(self, key: Tuple) -> Tuple[Optional[Any], Optional[str]]:
+        """Return ``(value, None)`` on a fresh hit, or ``(None, etag)`` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            
+            expires_at, etag, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value, None
+            
+            self.misses += 1
+            return None, etag if self.revalidate else None
+
+    def store(self, key: Tuple, kind: str, value: Any, etag: Optional[str] = None):
+        """Insert or refresh an entry, evicting the least recently used if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttls[kind], etag, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def refresh(self, key: Tuple, kind: str) -> Optional[Any]:
+        """Extend an entry after a 304 Not Modified and return its value."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self.revalidated += 1
+            self._entries[key] = (time.monotonic() + self.ttls[kind], entry[1], entry[2])
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def invalidate(self, endpoint: str):
+        """Drop every cached response for an endpoint."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == endpoint]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for measuring the cache's effect."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "revalidated": self.revalidated,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries)
+            }
+
+
+# Path segments that name resources rather than identify them
+STATIC_PATH_SEGMENTS = {
+    'flows', 'messages', 'bulk', 'activate', 'deactivate', 'simulate', 'analytics',
+    'export', 'vendors', 'health', 'users', 'stop', 'sms', 'whatsapp', 'email',
+    'voice', 'rcs', 'onboard', 'invite', 'roles'
+}
+
+
+@lru_cache(maxsize=4096)
+def _endpoint_template(endpoint: str) -> str:
+    """Collapse IDs in a path so metrics are labelled per endpoint, e.g. ``/flows/{id}``."""
+    return '/'.join(segment if not segment or segment in STATIC_PATH_SEGMENTS else '{id}'
+                    for segment in endpoint.split('?')[0].split('/'))
+
+
+@dataclass
+class RequestRecord:
+    """One attempt of an API request, as passed to post-request hooks."""
+    method: str
+    endpoint: str
+    attempt: int
+    started_at: float
+    duration: float
+    status: Optional[int] = None
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    outcome: str = 'ok'  # ok | rate_limited | retry | error
+    pacing_sleep_seconds: float = 0.0      # rate-limiter delay before this attempt
+    rate_limit_sleep_seconds: float = 0.0  # wait after a 429
+    backoff_sleep_seconds: float = 0.0     # backoff after a failed attempt
+    error: Optional[str] = None
+
+
+class RequestInstrumentation:
+    """Pluggable pre- and post-request hooks for the API clients.
+    
+    Pre-request hooks receive ``(method, endpoint, attempt)``; post-request
+    hooks receive a RequestRecord for every attempt, including retries and
+    rate-limit waits. With no hooks registered the clients skip
+    instrumentation entirely. Hook failures are logged, never raised.
+    """
+    
+    def __init__(self):
+        self.pre_request_hooks = []
+        self.post_request_hooks = []
+
+    def add_pre_request_hook(self, hook: Callable[[str, str, int], None]):
+        self.pre_request_hooks.append(hook)
+        return hook
+
+    def add_post_request_hook(self, hook: Callable[[RequestRecord], None]):
+        self.post_request_hooks.append(hook)
+        return hook
+
+    def before(self, method: str, endpoint: str, attempt: int):
+        for hook in self.pre_request_hooks:
+            try:
+                hook(method, _endpoint_template(endpoint), attempt)
+            except Exception:
+                logger.exception("Pre-request hook failed")
+
+    def after(self, method: str, endpoint: str, attempt: int, started_at: float, started: float,
+              status: Optional[int] = None, bytes_sent: int = 0, bytes_received: int = 0,
+              outcome: str = 'ok', pacing_sleep_seconds: float = 0.0, rate_limit_sleep_seconds: float = 0.0,
+              backoff_sleep_seconds: float = 0.0, error: Optional[Exception] = None):
+        record = RequestRecord(
+            method=method,
+            endpoint=_endpoint_template(endpoint),
+            attempt=attempt,
+            started_at=started_at,
+            duration=time.perf_counter() - started,
+            status=status,
+            bytes_sent=bytes_sent,
+            bytes_received=bytes_received,
+            outcome=outcome,
+            pacing_sleep_seconds=pacing_sleep_seconds,
+            rate_limit_sleep_seconds=rate_limit_sleep_seconds,
+            backoff_sleep_seconds=backoff_sleep_seconds,
+            error=str(error) if error is not None else None
+        )
+        for hook in self.post_request_hooks:
+            try:
+                hook(record)
+            except Exception:
+                logger.exception("Post-request hook failed")
+
+
+class RequestMetrics:
+    """Post-request hook that aggregates per-endpoint latency and traffic.
+    
+    Latencies go into fixed histogram buckets, so memory stays constant and
+    percentiles are interpolated within a bucket. ``prometheus_text``
+    renders a snapshot in the Prometheus text exposition format.
+    """
+    
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float('inf'))
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}  # (method, endpoint) -> counters
+
+    def __call__(self, record: RequestRecord):
+        key = (record.method, record.endpoint)
+        with self._lock:
+            stats = self._endpoints.get(key)
+            if stats is None:
+                stats = self._endpoints[key] = {
+                    "buckets": [0] * len(self.LATENCY_BUCKETS), "count": 0, "sum": 0.0,
+                    "retries": 0, "errors": 0, "rate_limited": 0, "pacing_sleep_seconds": 0.0,
+                    "rate_limit_sleep_seconds": 0.0, "backoff_sleep_seconds": 0.0,
+                    "bytes_sent": 0, "bytes_received": 0
+                }
+            stats["buckets"][bisect_left(self.LATENCY_BUCKETS, record.duration)] += 1
+            stats["count"] += 1
+            stats["sum"] += record.duration
+            stats["bytes_sent"] += record.bytes_sent
+            stats["bytes_received"] += record.bytes_received
+            stats["pacing_sleep_seconds"] += record.pacing_sleep_seconds
+            stats["rate_limit_sleep_seconds"] += record.rate_limit_sleep_seconds
+            stats["backoff_sleep_seconds"] += record.backoff_sleep_seconds
+            if record.attempt > 0:
+                stats["retries"] += 1
+            if record.outcome == 'rate_limited':
+                stats["rate_limited"] += 1
+            elif record.outcome in ('retry', 'error'):
+                stats["errors"] += 1
+
+    def _percentile(self, buckets: List[int], count: int, q: float) -> float:
+        target = q * count
+        seen, lower = 0, 0.0
+        for bound, bucket_count in zip(self.LATENCY_BUCKETS, buckets):
+            if bucket_count and seen + bucket_count >= target:
+                if bound == float('inf'):
+                    return lower
+                return lower + (bound - lower) * (target - seen) / bucket_count
+            seen += bucket_count
+            lower = bound
+        return lower
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint counters with p50/p95/p99 latency estimates."""
+        with self._lock:
+            result = {}
+            for (method, endpoint), stats in self._endpoints.items():
+                result[f"{method} {endpoint}"] = {
+                    "count": stats["count"],
+                    "p50": self._percentile(stats["buckets"], stats["count"], 0.50),
+                    "p95": self._percentile(stats["buckets"], stats["count"], 0.95),
+                    "p99": self._percentile(stats["buckets"], stats["count"], 0.99),
+                    **{k: v for k, v in stats.items() if k not in ("buckets", "count")}
+                }
+            return result
+
+    def prometheus_text(self, connection_stats: Optional[Dict[str, Any]] = None) -> str:
+        """Render the metrics in the Prometheus text exposition format."""
+        lines = [
+            "# TYPE flowforge_request_duration_seconds histogram",
+        ]
+        counters = {
+            "flowforge_request_retries_total": "retries",
+            "flowforge_request_errors_total": "errors",
+            "flowforge_rate_limited_total": "rate_limited",
+            "flowforge_pacing_sleep_seconds_total": "pacing_sleep_seconds",
+            "flowforge_rate_limit_sleep_seconds_total": "rate_limit_sleep_seconds",
+            "flowforge_backoff_sleep_seconds_total": "backoff_sleep_seconds",
+            "flowforge_bytes_sent_total": "bytes_sent",
+            "flowforge_bytes_received_total": "bytes_received"
+        }
+        
+        with self._lock:
+            items = [(key, dict(stats, buckets=list(stats["buckets"]))) for key, stats in self._endpoints.items()]
+        
+        for (method, endpoint), stats in items:
+            labels = f'method="{method}",endpoint="{endpoint}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.LATENCY_BUCKETS, stats["buckets"]):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f'flowforge_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'flowforge_request_duration_seconds_sum{{{labels}}} {stats["sum"]}')
+            lines.append(f'flowforge_request_duration_seconds_count{{{labels}}} {stats["count"]}')
+        
+        for name, field_name in counters.items():
+            lines.append(f"# TYPE {name} counter")
+            for (method, endpoint), stats in items:
+                lines.append(f'{name}{{method="{method}",endpoint="{endpoint}"}} {stats[field_name]}')
+        
+        if connection_stats:
+            lines.append("# TYPE flowforge_connection_reuse_ratio gauge")
+            lines.append(f"flowforge_connection_reuse_ratio {connection_stats['reuse_ratio']}")
+        
+        return "\n".join(lines) + "\n"
+
+
+def tracing_span_hook(callback: Callable[[Dict[str, Any]], None]) -> Callable[[RequestRecord], None]:
+    """Build a post-request hook that reports each attempt as a tracing span.
+    
+    ``callback`` receives a dict with ``name``, ``start_time``, ``end_time``
+    and ``attributes``, ready to hand to a tracer such as OpenTelemetry.
+    """
+    def hook(record: RequestRecord):
+        callback({
+            "name": f"{record.method} {record.endpoint}",
+            "start_time": record.started_at,
+            "end_time": record.started_at + record.duration,
+            "attributes": {
+                "http.method": record.method,
+                "http.route": record.endpoint,
+                "http.status_code": record.status,
+                "flowforge.attempt": record.attempt,
+                "flowforge.outcome": record.outcome,
+                "flowforge.pacing_sleep_seconds": record.pacing_sleep_seconds,
+                "flowforge.rate_limit_sleep_seconds": record.rate_limit_sleep_seconds,
+                "flowforge.backoff_sleep_seconds": record.backoff_sleep_seconds,
+                "flowforge.error": record.error
+            }
+        })
+    return hook
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breakers that fail fast while an endpoint is erroring.
+    
+    Outcomes are kept over the last ``window`` requests to each endpoint
+    template (``/flows/{id}``, ...). Once at least ``min_requests`` are seen
+    and the share of server errors and connection failures reaches
+    ``error_threshold``, the circuit opens and calls fail immediately for
+    ``cooldown`` seconds; after that a single probe is let through, which
+    closes the circuit on success or re-opens it on failure.
+    """
+    
+    def __init__(self, error_threshold: float = 0.5, window: int = 50,
+                 min_requests: int = 10, cooldown: float = 15.0):
+        self.error_threshold = error_threshold
+        self.window = window
+        self.min_requests = min_requests
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._circuits = {}  # template -> [outcomes deque, opened_at, probe_started_at]
+
+    def check(self, endpoint: str):
+        """Raise if the endpoint's circuit is open; otherwise allow the request."""
+        template = _endpoint_template(endpoint)
+        with self._lock:
+            circuit = self._circuits.get(template)
+            if circuit is None or circuit[1] is None:
+                return
+            now = time.monotonic()
+            # A probe that never reported back (e.g. cancelled) expires after a cooldown too
+            if now - max(circuit[1], circuit[2] or 0.0) < self.cooldown:
+                raise Exception(f"Circuit open for {template}; failing fast")
+            circuit[2] = now  # Half-open: this request is the probe
+
+    def record(self, endpoint: str, success: bool):
+        """Record the outcome of a request that was allowed through."""
+        template = _endpoint_template(endpoint)
+        with self._lock:
+            circuit = self._circuits.setdefault(template, [deque(maxlen=self.window), None, None])
+            outcomes = circuit[0]
+            if circuit[2] is not None:
+                # Probe result decides whether the circuit closes
+                outcomes.clear()
+                circuit[1] = None if success else time.monotonic()
+                circuit[2] = None
+                if success:
+                    logger.info("Circuit closed for %s", template)
+                return
+            
+            outcomes.append(success)
+            failures = len(outcomes) - sum(outcomes)
+            if (circuit[1] is None and len(outcomes) >= self.min_requests
+                    and failures >= self.error_threshold * len(outcomes)):
+                circuit[1] = time.monotonic()
+                logger.warning("Circuit opened for %s after %d/%d failures", template, failures, len(outcomes))
+
+    def state(self) -> Dict[str, str]:
+        """Current state of every tracked endpoint."""
+        with self._lock:
+            return {template: 'closed' if opened_at is None else 'half_open' if probe_started else 'open'
+                    for template, (_, opened_at, probe_started) in self._circuits.items()}
+
+
+class HedgingPolicy:
+    """Hedged requests for idempotent reads.
+    
+    If a GET has not answered after the endpoint's recent ``percentile``
+    latency (clamped to ``min_delay``..``max_delay``; ``max_delay`` until
+    ``min_samples`` are seen), a duplicate is sent and whichever response
+    arrives first wins. Hedges are capped at ``max_hedge_ratio`` of calls
+    so a slow API does not see its load multiplied. The hedge delay is
+    timed from when the first request starts, not from when it was queued.
+    Unless ``max_workers`` is given, the thread pool is sized from the
+    connection pools of the clients using the policy.
+    """
+    
+    def __init__(self, percentile: float = 0.95, min_delay: float = 0.01, max_delay: float = 1.0,
+                 min_samples: int = 20, max_hedge_ratio: float = 0.1, max_workers: Optional[int] = None):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.max_workers = max_workers
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._latencies = {}  # template -> deque of recent latencies
+        self._pool = None
+        self._auto_size = max_workers is None
+
+    def size_for(self, connections: int):
+        """Let calls from a client with ``connections`` pooled connections run in parallel.
+        
+        Each in-flight read may need a second thread for its hedge. Has no
+        effect once the thread pool exists or when ``max_workers`` was given.
+        """
+        with self._lock:
+            if self._auto_size and self._pool is None:
+                self.max_workers = max(self.max_workers or 0, 2 * connections)
+
+    def delay(self, endpoint: str) -> float:
+        """Seconds to wait on the first request before hedging."""
+        with self._lock:
+            samples = sorted(self._latencies.get(_endpoint_template(endpoint), ()))
+        if len(samples) < self.min_samples:
+            return self.max_delay
+        value = samples[min(len(samples) - 1, int(self.percentile * len(samples)))]
+        return min(self.max_delay, max(self.min_delay, value))
+
+    def observe(self, endpoint: str, seconds: float):
+        with self._lock:
+            template = _endpoint_template(endpoint)
+            self._latencies.setdefault(template, deque(maxlen=200)).append(seconds)
+
+    def _reserve_hedge(self) -> bool:
+        with self._lock:
+            if self.hedged >= self.max_hedge_ratio * self.calls:
+                return False
+            self.hedged += 1
+            return True
+
+    def _timed(self, endpoint: str, fn: Callable[[], Any],
+               running: Optional[threading.Event] = None) -> Any:
+        if running is not None:
+            running.set()
+        started = time.perf_counter()
+        value = fn()
+        self.observe(endpoint, time.perf_counter() - started)
+        return value
+
+    def call(self, endpoint: str, fn: Callable[[], Any]) -> Any:
+        """Run ``fn`` (a thread-safe read), hedging it if it is slow."""
+        with self._lock:
+            self.calls += 1
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers or 32)
+        
+        running = threading.Event()
+        primary = self._pool.submit(self._timed, endpoint, fn, running)
+        # Time spent queued for a thread must not count towards the hedge delay
+        running.wait()
+        done, _ = wait([primary], timeout=self.delay(endpoint))
+        if done or not self._reserve_hedge():
+            return primary.result()
+        
+        hedge = self._pool.submit(self._timed, endpoint, fn)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    async def call_async(self, endpoint: str, fn: Callable[[], Any]) -> Any:
+        """Asyncio counterpart of ``call``; ``fn`` returns a new coroutine per call."""
+        async def timed():
+            started = time.perf_counter()
+            value = await fn()
+            self.observe(endpoint, time.perf_counter() - started)
+            return value
+        
+        with self._lock:
+            self.calls += 1
+        primary = asyncio.ensure_future(timed())
+        done, _ = await asyncio.wait([primary], timeout=self.delay(endpoint))
+        if done or not self._reserve_hedge():
+            return await primary
+        
+        hedge = asyncio.ensure_future(timed())
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            with self._lock:
+                                self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "hedged": self.hedged, "hedge_wins": self.hedge_wins}
+
+
+class _LazyField:
+    """Descriptor over a model slot that decodes nested JSON on first access."""
+    __slots__ = ('name', 'slot')
+    
+    def __init__(self, name: str, slot):
+        self.name = name
+        self.slot = slot
+    
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        try:
+            value = self.slot.__get__(obj, owner)
+        except AttributeError:
+            return None
+        if type(value) is bytes:
+            value = orjson.loads(value) if orjson is not None else json.loads(value)
+            self.slot.__set__(obj, value)
+        return value
+
+
+class ResponseModel(Mapping):
+    """Slotted, read-only view of an API response that still behaves like a dict.
+    
+    Known top-level ``FIELDS`` live in ``__slots__``; nested objects and
+    arrays are kept as compact JSON bytes and only decoded the first time
+    they are read, so large result sets cost a fraction of the memory of
+    plain dict trees. Keys outside ``FIELDS`` are kept as-is. Models work
+    with ``model['key']``, ``.get``, ``in`` and iteration; use ``to_dict()``
+    where a real dict is needed (e.g. ``json.dumps``).
+    """
+    __slots__ = ('_extra',)
+    FIELDS: Tuple[str, ...] = ()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_set = frozenset(cls.FIELDS)
+        for name in cls.FIELDS:
+            setattr(cls, name, _LazyField(name, cls.__dict__['_' + name]))
+    
+    def __init__(self, data: Dict[str, Any]):
+        extra = None
+        fields = self._field_set
+        for key, value in data.items():
+            if key in fields:
+                if isinstance(value, (dict, list)) and value:
+                    # Copy to an exact-size object; orjson over-allocates its output buffer
+                    value = bytes(memoryview(_json_bytes(value)))
+                setattr(self, '_' + key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self._extra = extra
+    
+    def _has(self, key: str) -> bool:
+        return hasattr(self, '_' + key)
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in self._field_set:
+            if self._has(key):
+                return getattr(self, key)
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        for name in self.FIELDS:
+            if self._has(name):
+                yield name
+        if self._extra:
+            yield from self._extra
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """A plain dict copy, decoding every nested section."""
+        return {key: self[key] for key in self}
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _slots(fields: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple('_' + name for name in fields)
+
+
+class Flow(ResponseModel):
+    FIELDS = ('id', 'name', 'description', 'status', 'channel', 'created_at', 'updated_at',
+              'activated_at', 'configuration', 'metrics')
+    __slots__ = _slots(FIELDS)
+
+
+class Message(ResponseModel):
+    FIELDS = ('message_id', 'flow_id', 'recipient', 'status', 'created_at', 'sent_at',
+              'delivered_at', 'routing', 'metadata')
+    __slots__ = _slots(FIELDS)
+
+
+class Vendor(ResponseModel):
+    FIELDS = ('id', 'name', 'channel', 'status', 'configuration', 'capabilities', 'pricing', 'health')
+    __slots__ = _slots(FIELDS)
+
+
+class VendorHealth(ResponseModel):
+    FIELDS = ('vendor_id', 'status', 'checks', 'metrics')
+    __slots__ = _slots(FIELDS)
+
+
+class AnalyticsSummary(ResponseModel):
+    FIELDS = ('flow_id', 'period', 'granularity', 'summary', 'vendor_breakdown',
+              'time_series', 'error_breakdown')
+    __slots__ = _slots(FIELDS)
+
+
+def _traffic(response: Optional[requests.Response]) -> Tuple[Optional[int], int, int]:
+    """Status code, bytes sent and bytes received for a requests response."""
+    if response is None:
+        return None, 0, 0
+    body = response.request.body
+    return response.status_code, len(body) if body else 0, len(response.content)
 
 
 class FlowForgeClient:
     """FlowForge API client for Python applications."""
     
-    def __init__(self, api_key: str, base_url: str = "https://api.flowforge.com/v1"):
-        self.api_key = api_key
-        self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
-            'Authorization': f'Bearer {api_key}',
-            'Content-Type': 'application/json'
-        })
+    def __init__(self, api_key: str, base_url: str = "https://api.flowforge.com/v1",
+                 pool_maxsize: int = 10, rate_limiter: Optional[RateLimiter] = None,
+                 cache: Optional[ResponseCache] = None,
+                 instrumentation: Optional[RequestInstrumentation] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 hedging: Optional[HedgingPolicy] = None,
+                 typed_models: bool = False,
+                 session: Optional[requests.Session] = None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.typed_models = typed_models
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.cache = cache
+        self.instrumentation = instrumentation
+        self.circuit_breaker = circuit_breaker
+        self.hedging = hedging
+        self.pool_maxsize = pool_maxsize
+        if hedging is not None:
+            hedging.size_for(pool_maxsize)
+        headers = {
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json'
+        }
+        
+        if session is not None:
+            # Shared session (see TenantClientPool): credentials go on each request
+            self.session = session
+            self._request_headers = headers
+            return
+        
+        self.session = requests.Session()
+        self._request_headers = None
+        
+        # Size the keep-alive pool for concurrent callers such as send_bulk
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update(headers)
+
+    def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """Make an API request and decode the JSON response."""
+        return self._send(method, endpoint, **kwargs).json()
+
+    def _send(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """Make an API request, hedging idempotent reads when a HedgingPolicy is set."""
+        if self.hedging is not None and method == 'GET':
+            return self.hedging.call(endpoint, lambda: self._send_with_retry(method, endpoint, **kwargs))
+        return self._send_with_retry(method, endpoint, **kwargs)
+
+    def _send_with_retry(self, method: str, endpoint: str, **kwargs) -> requests.Response:
+        """Make an API request with error handling and retry logic."""
+        url = f"{self.base_url}{endpoint}"
+        hooks = self.instrumentation
+        breaker = self.circuit_breaker
+        if self._request_headers is not None:
+            kwargs['headers'] = dict(self._request_headers, **(kwargs.get('headers') or {}))
+        
+        for attempt in range(MAX_ATTEMPTS):
+            if breaker:
+                breaker.check(endpoint)
+            delay = self.rate_limiter.reserve()
+            if delay > 0:
+                time.sleep(delay)
+            
+            if hooks:
+                hooks.before(method, endpoint, attempt)
+                started_at, started = time.time(), time.perf_counter()
+            response = None
+            
+            try:
+                response = self.session.request(method, url, **kwargs)
+                self.rate_limiter.update(response.headers)
+                if breaker:
+                    breaker.record(endpoint, response.status_code < 500)
+                
+                # Handle rate limiting
+                if response.status_code == 429:
+                    wait_time = _rate_limit_wait(response.headers)
+                    
+                    if wait_time > 0:
+                        logger.warning("Rate limited. Waiting %s seconds...", wait_time)
+                        if hooks:
+                            hooks.after(method, endpoint, attempt, started_at, started,
+                                        *_traffic(response), outcome='rate_limited',
+                                        pacing_sleep_seconds=delay, rate_limit_sleep_seconds=wait_time)
+                        time.sleep(wait_time)
+                        continue
+                
+                response.raise_for_status()
+                if hooks:
+                    hooks.after(method, endpoint, attempt, started_at, started, *_traffic(response),
+                                pacing_sleep_seconds=delay)
+                return response
+                
+            except requests.exceptions.RequestException as e:
+                if breaker and response is None:
+                    breaker.record(endpoint, False)
+                if attempt == MAX_ATTEMPTS - 1:  # Last attempt
+                    if hooks:
+                        hooks.after(method, endpoint, attempt, started_at, started,
+                                    *_traffic(response), outcome='error', pacing_sleep_seconds=delay, error=e)
+                    raise Exception(f"API request failed after {MAX_ATTEMPTS} attempts: {str(e)}")
+                
+                # Jittered exponential backoff
+                wait_time = _backoff_delay(attempt)
+                logger.warning("Attempt %d failed. Retrying in %.2fs...", attempt + 1, wait_time)
+                if hooks:
+                    hooks.after(method, endpoint, attempt, started_at, started, *_traffic(response),
+                                outcome='retry', pacing_sleep_seconds=delay,
+                                backoff_sleep_seconds=wait_time, error=e)
+                time.sleep(wait_time)
+        
+        raise Exception(f"API request failed after {MAX_ATTEMPTS} attempts: rate limited")
+
+    def connection_stats(self) -> Dict[str, Any]:
+        """Connection reuse across the session's keep-alive pools."""
+        requests_made = connections = 0
+        # One adapter is usually mounted for both schemes; count each pool once
+        adapters = {id(adapter): adapter for adapter in self.session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                requests_made += pool.num_requests
+                connections += pool.num_connections
+        return {
+            "requests": requests_made,
+            "connections": connections,
+            "reuse_ratio": 1 - connections / requests_made if requests_made else 0.0
+        }
+
+    def _model(self, model: type, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Wrap a response in its ResponseModel when ``typed_models`` is on."""
+        return model(data) if self.typed_models else data
+
+    def _model_page(self, model: type, page: Dict[str, Any]) -> Dict[str, Any]:
+        if not self.typed_models:
+            return page
+        return dict(page, data=[model(item) for item in page.get('data', [])])
+
+    def _cached_get(self, kind: str, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """GET through the response cache, revalidating with ETags when possible."""
+        if self.cache is None:
+            return self._request('GET', endpoint, params=params)
+        
+        key = self.cache.key(endpoint, params)
+        value, etag = self.cache.lookup(key)
+        if value is not None:
+            return value
+        
+        headers = {'If-None-Match': etag} if etag else None
+        response = self._send('GET', endpoint, params=params, headers=headers)
+        if response.status_code == 304:
+            value = self.cache.refresh(key, kind)
+            if value is not None:
+                return value
+            response = self._send('GET', endpoint, params=params)
+        
+        value = response.json()
+        self.cache.store(key, kind, value, response.headers.get('ETag'))
+        return value
+
+    # Flow Management Methods
+    def list_flows(self, **params) -> Dict[str, Any]:
+        """List all flows with optional filtering."""
+        return self._model_page(Flow, self._request('GET', '/flows', params=params))
+
+    def get_flow(self, flow_id: str) -> Dict[str, Any]:
+        """Get a specific flow by ID."""
+        return self._model(Flow, self._cached_get('flow', f'/flows/{flow_id}'))
+
+    def create_flow(self, flow_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new flow."""
+        return self._model(Flow, self._request('POST', '/flows', json=flow_data))
+
+    def update_flow(self, flow_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Update an existing flow."""
+        flow = self._request('PUT', f'/flows/{flow_id}', json=updates)
+        self._invalidate_flow(flow_id)
+        return self._model(Flow, flow)
+
+    def update_flow_incremental(self, flow_id: str, changes: Dict[str, Any],
+                                validator: Optional['FlowValidator'] = None) -> Dict[str, Any]:
+        """Validate locally, then send only the fields that differ from the current flow.
+        
+        ``changes`` may be a full flow or any subset of ``name``,
+        ``description`` and ``configuration``. The current flow comes from
+        the response cache when one is configured. PUT /flows/{flow_id}
+        replaces ``configuration`` as a whole, so it is included only when
+        something in it changed, and no request is made if nothing did.
+        Only graph checks run by default; pass
+        ``validator=FlowValidator.from_openapi()`` to also check the OpenAPI
+        schemas (requires ``pyyaml`` and the spec file).
+        """
+        current = self.get_flow(flow_id)
+        patch = {field: changes[field] for field in ('name', 'description', 'configuration')
+                 if field in changes and changes[field] != current.get(field)}
+        if not patch:
+            return current
+        
+        if 'configuration' in patch:
+            (validator or FlowValidator()).check(patch['configuration'])
+            diff = diff_flow_configuration(current.get('configuration') or {}, patch['configuration'])
+            summary = {kind: {change: len(ids) for change, ids in entries.items() if ids}
+                       for kind, entries in diff.items()}
+            logger.info("Updating flow %s: %s", flow_id, summary)
+        return self.update_flow(flow_id, patch)
+
+    def activate_flow(self, flow_id: str) -> Dict[str, Any]:
+        """Activate a flow."""
+        flow = self._request('POST', f'/flows/{flow_id}/activate')
+        self._invalidate_flow(flow_id)
+        return self._model(Flow, flow)
+
+    def deactivate_flow(self, flow_id: str) -> Dict[str, Any]:
+        """Deactivate a flow."""
+        flow = self._request('POST', f'/flows/{flow_id}/deactivate')
+        self._invalidate_flow(flow_id)
+        return self._model(Flow, flow)
+
+    def _invalidate_flow(self, flow_id: str):
+        """Drop any cached copy of a flow after it has changed."""
+        if self.cache is not None:
+            self.cache.invalidate(f'/flows/{flow_id}')
+
+    def simulate_flow(self, flow_id: str, test_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Simulate flow execution."""
+        return self._request('POST', f'/flows/{flow_id}/simulate', 
+                           json={'test_parameters': test_params})
+
+    # Message Operations
+    def send_message(self, flow_id: str, message_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a single message through a flow."""
+        return self._model(Message, self._request('POST', f'/flows/{flow_id}/messages', json=message_data))
+
+    def send_bulk_messages(self, flow_id: str, messages: List[Dict[str, Any]], 
+                          options: Optional[Dict[str, Any]] = None,
+                          idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Send multiple messages in bulk."""
+        payload = {'messages': messages}
+        if options:
+            payload['options'] = options
+        headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+        return self._request('POST', f'/flows/{flow_id}/messages/bulk', json=payload, headers=headers)
+
+    def send_bulk_payload(self, flow_id: str, body: bytes,
+                          content_encoding: Optional[str] = None,
+                          idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Send a pre-encoded bulk body, e.g. from BulkPayloadBuilder.encode."""
+        headers = {'Content-Type': 'application/json'}
+        if content_encoding:
+            headers['Content-Encoding'] = content_encoding
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        return self._request('POST', f'/flows/{flow_id}/messages/bulk', data=body, headers=headers)
+
+    def send_bulk(self, flow_id: str, messages: Iterable[Any],
+                  batch_size: int = 100, concurrency: int = 4,
+                  options: Optional[Dict[str, Any]] = None,
+                  max_batch_retries: int = 2,
+                  encoder: Optional[BulkPayloadBuilder] = None,
+                  journal: Optional[CampaignJournal] = None) -> BulkSendResult:
+        """Send any iterable of messages as pipelined bulk batches.
+        
+        Messages are consumed lazily and split into batches of ``batch_size``,
+        keeping up to ``concurrency`` bulk requests in flight. A batch that
+        fails is resubmitted on its own, up to ``max_batch_retries`` times.
+        With an ``encoder``, messages are recipient rows and each batch is
+        encoded (and compressed) on the worker thread that sends it.
+        Every batch carries an ``Idempotency-Key`` that is reused for its
+        retries, so a resubmitted batch whose earlier attempt was accepted
+        (e.g. behind a read timeout) is not sent twice. With a ``journal``,
+        batches it already committed are skipped and the rest are sent under
+        keys that survive a restart.
+        """
+        result = BulkSendResult()
+        if journal is None:
+            batches = enumerate(_chunked(messages, batch_size))
+        else:
+            batches = journal.pending_batches(messages, batch_size)
+            result.skipped = journal.committed_messages
+        run_id = os.urandom(8).hex()
+        in_flight = {}
+        
+        def send_batch(batch, key):
+            if encoder is None:
+                return self.send_bulk_messages(flow_id, batch, options, idempotency_key=key)
+            return self.send_bulk_payload(flow_id, encoder.encode(batch, options), encoder.content_encoding,
+                                          idempotency_key=key)
+        
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            def submit(index, batch, attempts, key=None):
+                if key is None:
+                    # Journal before sending, so a crash mid-request replays the same key
+                    key = journal.begin(index, len(batch)) if journal else f"{run_id}-{index}"
+                future = pool.submit(send_batch, batch, key)
+                in_flight[future] = (index, batch, attempts, key)
+            
+            exhausted = False
+            while True:
+                # Top up the pipeline from the (possibly lazy) message source
+                while not exhausted and len(in_flight) < concurrency:
+                    next_batch = next(batches, None)
+                    if next_batch is None:
+                        exhausted = True
+                    else:
+                        submit(next_batch[0], next_batch[1], 1)
+                
+                if not in_flight:
+                    break
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, batch, attempts, key = in_flight.pop(future)
+                    try:
+                        response = future.result()
+                    except Exception as e:
+                        if attempts <= max_batch_retries:
+                            logger.warning("Batch %d failed. Resubmitting (attempt %d)...", index + 1, attempts + 1)
+                            submit(index, batch, attempts + 1, key)
+                        else:
+                            result.record_failure(index, len(batch), attempts, e)
+                            if journal:
+                                journal.fail(index, e)
+                        continue
+                    
+                    result.record_batch(index, len(batch), attempts, response)
+                    if journal:
+                        journal.commit(index, response)
+        
+        return result
+
+    def get_message_status(self, message_id: str) -> Dict[str, Any]:
+        """Get the status of a specific message."""
+        return self._model(Message, self._request('GET', f'/messages/{message_id}'))
+
+    def list_flow_messages(self, flow_id: str, **params) -> Dict[str, Any]:
+        """List one page of messages sent through a flow."""
+        return self._model_page(Message, self._request('GET', f'/flows/{flow_id}/messages', params=params))
+
+    # User Management
+    def list_users(self, **params) -> Dict[str, Any]:
+        """List one page of users."""
+        return self._request('GET', '/users', params=params)
+
+    # Pagination
+    def _iter_pages(self, endpoint: str, **params) -> Iterator[Dict[str, Any]]:
+        """Follow ``next_cursor`` links, fetching each page while the previous one is consumed."""
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            page = self._request('GET', endpoint, params=params)
+            while True:
+                pagination = page.get('pagination') or {}
+                next_cursor = pagination.get('next_cursor')
+                next_page = None
+                if next_cursor and pagination.get('has_more', True):
+                    next_page = prefetcher.submit(self._request, 'GET', endpoint,
+                                                  params=dict(params, cursor=next_cursor))
+                
+                yield page
+                
+                if next_page is None:
+                    return
+                page = next_page.result()
+
+    def _paginate(self, endpoint: str, limit: int = 100, model: Optional[type] = None,
+                  **params) -> Iterator[Dict[str, Any]]:
+        """Lazily yield every item of a cursor-paginated endpoint."""
+        wrap = model if model is not None and self.typed_models else None
+        for page in self._iter_pages(endpoint, limit=limit, **params):
+            items = page.get('data', [])
+            yield from (map(wrap, items) if wrap else items)
+
+    def iter_flows(self, limit: int = 100, **params) -> Iterator[Dict[str, Any]]:
+        """Iterate over all flows, one page in memory at a time."""
+        return self._paginate('/flows', limit=limit, model=Flow, **params)
+
+    def iter_flow_messages(self, flow_id: str, limit: int = 100, **params) -> Iterator[Dict[str, Any]]:
+        """Iterate over all messages of a flow, one page in memory at a time."""
+        return self._paginate(f'/flows/{flow_id}/messages', limit=limit, model=Message, **params)
+
+    def iter_users(self, limit: int = 100, **params) -> Iterator[Dict[str, Any]]:
+        """Iterate over all users, one page in memory at a time."""
+        return self._paginate('/users', limit=limit, **params)
+
+    def iter_flow_messages_partitioned(self, flow_id: str, start_date: datetime,
+                                       end_date: datetime, partitions: int = 4,
+                                       limit: int = 100, **params) -> Iterator[Dict[str, Any]]:
+        """Iterate over a flow's messages by walking time partitions in parallel.
+        
+        The ``start_date``/``end_date`` range is split into ``partitions``
+        equal slices, each paginated on its own thread. Pages are handed over
+        through a bounded queue, so memory stays flat; messages from
+        different slices are interleaved rather than globally ordered.
+        """
+        endpoint = f'/flows/{flow_id}/messages'
+        step = (end_date - start_date) / partitions
+        pages = queue.Queue(maxsize=partitions * 2)
+        stop = threading.Event()
+        finished = object()
+        
+        def put(item):
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    continue
+        
+        def walk(lower: datetime, upper: datetime):
+            try:
+                for page in self._iter_pages(endpoint, limit=limit, start_date=lower.isoformat(),
+                                             end_date=upper.isoformat(), **params):
+                    if stop.is_set():
+                        return
+                    put(page.get('data', []))
+            except Exception as e:
+                put(e)
+            finally:
+                put(finished)
+        
+        pool = ThreadPoolExecutor(max_workers=partitions)
+        try:
+            for i in range(partitions):
+                pool.submit(walk, start_date + step * i, start_date + step * (i + 1))
+            
+            remaining = partitions
+            while remaining:
+                item = pages.get()
+                if item is finished:
+                    remaining -= 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield from item
+        finally:
+            stop.set()
+            pool.shutdown(wait=False)
+
+    # Analytics
+    def get_flow_analytics(self, flow_id: str, **params) -> Dict[str, Any]:
+        """Get analytics for a specific flow."""
+        return self._model(AnalyticsSummary, self._request('GET', f'/flows/{flow_id}/analytics', params=params))
+
+    def get_global_analytics(self, **params) -> Dict[str, Any]:
+        """Get global analytics across all flows."""
+        return self._model(AnalyticsSummary, self._request('GET', '/analytics', params=params))
+
+    def export_analytics(self, export_request: Dict[str, Any]) -> Dict[str, Any]:
+        """Start an asynchronous analytics export."""
+        return self._request('POST', '/analytics/export', json=export_request)
+
+    def get_analytics_export(self, export_id: str) -> Dict[str, Any]:
+        """Get the status of an analytics export."""
+        return self._request('GET', f'/analytics/export/{export_id}')
+
+    def wait_for_export(self, export_id: str, timeout: float = 3600,
+                        initial_interval: float = 2.0, max_interval: float = 60.0) -> Dict[str, Any]:
+        """Poll an export with exponential backoff until its download URL is ready."""
+        deadline = time.monotonic() + timeout
+        interval = initial_interval
+        
+        while True:
+            export = self.get_analytics_export(export_id)
+            if export.get('status') == 'failed':
+                raise Exception(f"Analytics export {export_id} failed: {export.get('error', 'unknown error')}")
+            if export.get('download_url'):
+                return export
+            
+            if time.monotonic() + interval > deadline:
+                raise TimeoutError(f"Analytics export {export_id} not ready after {timeout}s")
+            time.sleep(interval)
+            interval = min(interval * 2, max_interval)
+
+    def download_export(self, download_url: str, path: str, export_id: Optional[str] = None,
+                        chunk_size: int = 1024 * 1024) -> str:
+        """Stream an export to disk, resuming interrupted downloads with ranged reads.
+        
+        Data is written to ``<path>.<export_id>.part`` and renamed once
+        complete, so a re-run after a crash continues from the bytes already
+        on disk while a leftover file from another export is never reused.
+        Resumed requests carry ``If-Range`` with the ETag (or Last-Modified)
+        seen when the download started; if the server answers with the full
+        body or a mismatched ``Content-Range`` the download restarts from zero.
+        """
+        partial_path = f"{path}.{export_id}.part" if export_id else f"{path}.part"
+        validator_path = f"{partial_path}.validator"
+        # Pre-signed download URLs must not receive the API token
+        if download_url.startswith(self.base_url):
+            headers = dict(self._request_headers or {})
+        else:
+            headers = {'Authorization': None}
+        
+        def restart():
+            for stale in (partial_path, validator_path):
+                if os.path.exists(stale):
+                    os.remove(stale)
+        
+        for attempt in range(MAX_ATTEMPTS):
+            offset = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+            validator = None
+            if offset and os.path.exists(validator_path):
+                with open(validator_path, encoding='utf-8') as f:
+                    validator = f.read().strip() or None
+            if offset and validator is None:
+                restart()  # Nothing proves the bytes on disk belong to this file
+                offset = 0
+            range_headers = headers
+            if offset:
+                range_headers = dict(headers, Range=f'bytes={offset}-', **{'If-Range': validator})
+            
+            try:
+                with self.session.get(download_url, headers=range_headers, stream=True) as response:
+                    content_range = response.headers.get('Content-Range', '')
+                    if response.status_code == 416:
+                        # Range starts at the end: complete only if the sizes agree
+                        if content_range == f'bytes */{offset}':
+                            break
+                        restart()
+                        raise requests.exceptions.RequestException(
+                            f"Range not satisfiable ({content_range or 'no Content-Range'}); restarting")
+                    response.raise_for_status()
+                    
+                    if response.status_code == 206:
+                        if not content_range.startswith(f'bytes {offset}-'):
+                            restart()
+                            raise requests.exceptions.RequestException(
+                                f"Unexpected Content-Range {content_range!r} for offset {offset}; restarting")
+                        mode = 'ab'
+                    else:
+                        # A 200 means the range was ignored or the file changed; start over
+                        mode = 'wb'
+                        new_validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+                        if new_validator:
+                            with open(validator_path, 'w', encoding='utf-8') as f:
+                                f.write(new_validator)
+                        elif os.path.exists(validator_path):
+                            os.remove(validator_path)
+                    
+                    with open(partial_path, mode) as f:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            f.write(chunk)
+                break
+                
+            except requests.exceptions.RequestException as e:
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise Exception(f"Export download failed after {MAX_ATTEMPTS} attempts: {str(e)}")
+                
+                wait_time = _backoff_delay(attempt)
+                logger.warning("Download interrupted. Resuming in %.2fs...", wait_time)
+                time.sleep(wait_time)
+        
+        os.replace(partial_path, path)
+        if os.path.exists(validator_path):
+            os.remove(validator_path)
+        return path
+
+    # Vendor Management
+    def list_vendors(self, **params) -> Dict[str, Any]:
+        """List all configured vendors."""
+        return self._model_page(Vendor, self._cached_get('vendors', '/vendors', params=params))
+
+    def get_vendor_health(self, vendor_id: str) -> Dict[str, Any]:
+        """Get health status for a specific vendor."""
+        return self._model(VendorHealth, self._cached_get('vendor_health', f'/vendors/{vendor_id}/health'))
+
+    # Webhook Utilities
+    def verify_webhook_signature(self, payload: str, signature: str, secret: str) -> bool:
+        """Verify webhook signature for security."""
+        expected_signature = hmac.new(
+            secret.encode('utf-8'),
+            payload.encode('utf-8'),
+            hashlib.sha256
+        ).hexdigest()
+        
+        received_signature = signature.replace('sha256=', '')
+        return hmac.compare_digest(expected_signature, received_signature)
+
+
+class TenantClientPool:
+    """FlowForgeClients for many API keys over one shared connection pool.
+    
+    Every tenant's client reuses a single ``requests.Session``, so keep-alive
+    connections and TLS sessions are shared instead of opened per key; the
+    tenant's ``Authorization`` header is added to each request. The shared
+    session rejects all cookies so no state leaks between tenants. Each tenant
+    keeps its own RateLimiter (and ResponseCache when ``cache_entries`` is
+    set), since quotas and data are per account. Clients are kept in LRU
+    order: at most ``max_tenants`` are retained, and tenants idle for longer
+    than ``idle_timeout`` seconds are dropped and rebuilt on next use.
+    """
+    
+    def __init__(self, base_url: str = "https://api.flowforge.com/v1", pool_maxsize: int = 50,
+                 max_tenants: int = 1000, idle_timeout: Optional[float] = 900.0,
+                 cache_entries: int = 0, instrumentation: Optional[RequestInstrumentation] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 hedging: Optional[HedgingPolicy] = None, typed_models: bool = False):
+        self.base_url = base_url
+        self.pool_maxsize = pool_maxsize
+        self.max_tenants = max_tenants
+        self.idle_timeout = idle_timeout
+        self.cache_entries = cache_entries
+        # Shared across tenants: these describe the API, not an account
+        self.client_options = {
+            'instrumentation': instrumentation, 'circuit_breaker': circuit_breaker,
+            'hedging': hedging, 'typed_models': typed_models
+        }
+        self.evictions = 0
+        
+        self.session = requests.Session()
+        # Only connections are shared: a cookie set for one tenant must never
+        # be replayed on another tenant's requests
+        self.session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        self._lock = threading.Lock()
+        self._tenants = OrderedDict()  # api_key -> (client, last_used)
+    
+    def client(self, api_key: str) -> FlowForgeClient:
+        """The tenant's client, created on first use."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._tenants.pop(api_key, None)
+            self._evict(now)
+            if entry is None:
+                cache = ResponseCache(max_entries=self.cache_entries) if self.cache_entries else None
+                client = FlowForgeClient(api_key, self.base_url, pool_maxsize=self.pool_maxsize,
+                                         cache=cache, session=self.session, **self.client_options)
+            else:
+                client = entry[0]
+            self._tenants[api_key] = (client, now)
+            return client
+    
+    __getitem__ = client
+    
+    def _evict(self, now: float):
+        """Drop idle tenants, then the least recently used beyond ``max_tenants``."""
+        tenants = self._tenants
+        if self.idle_timeout is not None:
+            while tenants:
+                api_key, (_, last_used) = next(iter(tenants.items()))
+                if now - last_used < self.idle_timeout:
+                    break
+                del tenants[api_key]
+                self.evictions += 1
+        while len(tenants) >= self.max_tenants:
+            tenants.popitem(last=False)
+            self.evictions += 1
+    
+    def remove(self, api_key: str):
+        """Forget a tenant (e.g. after its key is revoked)."""
+        with self._lock:
+            self._tenants.pop(api_key, None)
+    
+    def __len__(self) -> int:
+        return len(self._tenants)
+    
+    def close(self):
+        """Close the shared connection pool."""
+        with self._lock:
+            self._tenants.clear()
+        self.session.close()
+    
+    connection_stats = FlowForgeClient.connection_stats
+
+
+class AsyncFlowForgeClient:
+    """Asyncio FlowForge API client backed by a shared keep-alive connection pool.
+    
+    Requires ``aiohttp``. Exposes the same flow, message, analytics and vendor
+    methods as FlowForgeClient as coroutines, and applies the same retry and
+    rate-limit handling. ``max_connections`` bounds the pool size and
+    ``max_in_flight`` caps how many requests may be outstanding at once.
+    """
+    
+    def __init__(self, api_key: str, base_url: str = "https://api.flowforge.com/v1",
+                 max_connections: int = 100, max_in_flight: Optional[int] = None,
+                 keepalive_timeout: float = 30.0, rate_limiter: Optional[RateLimiter] = None,
+                 instrumentation: Optional[RequestInstrumentation] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 hedging: Optional[HedgingPolicy] = None,
+                 typed_models: bool = False):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.typed_models = typed_models
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.instrumentation = instrumentation
+        self.circuit_breaker = circuit_breaker
+        self.hedging = hedging
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.headers = {
+            'Authorization': f'Bearer {api_key}',
+            'Content-Type': 'application/json'
+        }
+        self._in_flight = asyncio.Semaphore(max_in_flight or max_connections)
+        self._session = None
+
+    async def __aenter__(self) -> 'AsyncFlowForgeClient':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _get_session(self):
+        """Lazily create the aiohttp session on the running event loop."""
+        import aiohttp
+        
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                keepalive_timeout=self.keepalive_timeout
+            )
+            self._session = aiohttp.ClientSession(headers=self.headers, connector=connector)
+        return self._session
+
+    async def close(self):
+        """Close the underlying connection pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """Make an API request, hedging idempotent reads when a HedgingPolicy is set."""
+        if self.hedging is not None and method == 'GET':
+            return await self.hedging.call_async(
+                endpoint, lambda: self._request_with_retry(method, endpoint, **kwargs))
+        return await self._request_with_retry(method, endpoint, **kwargs)
+
+    async def _request_with_retry(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+        """Make an API request with the same retry policy as FlowForgeClient._send."""
+        import aiohttp
+        
+        url = f"{self.base_url}{endpoint}"
+        session = self._get_session()
+        hooks = self.instrumentation
+        breaker = self.circuit_breaker
+        
+        for attempt in range(MAX_ATTEMPTS):
+            if breaker:
+                breaker.check(endpoint)
+            delay = self.rate_limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            if hooks:
+                hooks.before(method, endpoint, attempt)
+                started_at, started = time.time(), time.perf_counter()
+            status, bytes_sent = None, 0
+            
+            try:
+                # Hold an in-flight slot only while the request is on the wire,
+                # never while sleeping on a rate limit or backoff
+                async with self._in_flight:
+                    async with session.request(method, url, **kwargs) as response:
+                        self.rate_limiter.update(response.headers)
+                        status = response.status
+                        if breaker:
+                            breaker.record(endpoint, status < 500)
+                        bytes_sent = int(response.request_info.headers.get('Content-Length', 0))
+                        wait_time = 0
+                        if response.status == 429:
+                            wait_time = _rate_limit_wait(response.headers)
+                        
+                        if wait_time == 0:
+                            response.raise_for_status()
+                            body = await response.read()
+                            if hooks:
+                                hooks.after(method, endpoint, attempt, started_at, started,
+                                            status, bytes_sent, len(body), pacing_sleep_seconds=delay)
+                            return json.loads(body)
+                
+                logger.warning("Rate limited. Waiting %s seconds...", wait_time)
+                if hooks:
+                    hooks.after(method, endpoint, attempt, started_at, started, status, bytes_sent,
+                                outcome='rate_limited', pacing_sleep_seconds=delay,
+                                rate_limit_sleep_seconds=wait_time)
+                await asyncio.sleep(wait_time)
+                
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if breaker and status is None:
+                    breaker.record(endpoint, False)
+                if attempt == MAX_ATTEMPTS - 1:  # Last attempt
+                    if hooks:
+                        hooks.after(method, endpoint, attempt, started_at, started, status, bytes_sent,
+                                    outcome='error', pacing_sleep_seconds=delay, error=e)
+                    raise Exception(f"API request failed after {MAX_ATTEMPTS} attempts: {str(e)}")
+                
+                # Jittered exponential backoff
+                wait_time = _backoff_delay(attempt)
+                logger.warning("Attempt %d failed. Retrying in %.2fs...", attempt + 1, wait_time)
+                if hooks:
+                    hooks.after(method, endpoint, attempt, started_at, started, status, bytes_sent,
+                                outcome='retry', pacing_sleep_seconds=delay,
+                                backoff_sleep_seconds=wait_time, error=e)
+                await asyncio.sleep(wait_time)
+        
+        raise Exception(f"API request failed after {MAX_ATTEMPTS} attempts: rate limited")
+
+    _model = FlowForgeClient._model
+    _model_page = FlowForgeClient._model_page
+
+    # Flow Management Methods
+    async def list_flows(self, **params) -> Dict[str, Any]:
+        """List all flows with optional filtering."""
+        return self._model_page(Flow, await self._request('GET', '/flows', params=params))
+
+    async def get_flow(self, flow_id: str) -> Dict[str, Any]:
+        """Get a specific flow by ID."""
+        return self._model(Flow, await self._request('GET', f'/flows/{flow_id}'))
+
+    async def create_flow(self, flow_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a new flow."""
+        return self._model(Flow, await self._request('POST', '/flows', json=flow_data))
+
+    async def update_flow(self, flow_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
+        """Update an existing flow."""
+        return self._model(Flow, await self._request('PUT', f'/flows/{flow_id}', json=updates))
+
+    async def activate_flow(self, flow_id: str) -> Dict[str, Any]:
+        """Activate a flow."""
+        return self._model(Flow, await self._request('POST', f'/flows/{flow_id}/activate'))
+
+    async def deactivate_flow(self, flow_id: str) -> Dict[str, Any]:
+        """Deactivate a flow."""
+        return self._model(Flow, await self._request('POST', f'/flows/{flow_id}/deactivate'))
+
+    async def simulate_flow(self, flow_id: str, test_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Simulate flow execution."""
+        return await self._request('POST', f'/flows/{flow_id}/simulate',
+                                   json={'test_parameters': test_params})
+
+    # Message Operations
+    async def send_message(self, flow_id: str, message_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Send a single message through a flow."""
+        return self._model(Message, await self._request('POST', f'/flows/{flow_id}/messages', json=message_data))
+
+    async def send_bulk_messages(self, flow_id: str, messages: List[Dict[str, Any]],
+                                 options: Optional[Dict[str, Any]] = None,
+                                 idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Send multiple messages in bulk."""
+        payload = {'messages': messages}
+        if options:
+            payload['options'] = options
+        headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+        return await self._request('POST', f'/flows/{flow_id}/messages/bulk', json=payload, headers=headers)
+
+    async def send_bulk_payload(self, flow_id: str, body: bytes,
+                                content_encoding: Optional[str] = None,
+                                idempotency_key: Optional[str] = None) -> Dict[str, Any]:
+        """Send a pre-encoded bulk body, e.g. from BulkPayloadBuilder.encode."""
+        headers = {'Content-Type': 'application/json'}
+        if content_encoding:
+            headers['Content-Encoding'] = content_encoding
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        return await self._request('POST', f'/flows/{flow_id}/messages/bulk', data=body, headers=headers)
+
+    async def get_message_status(self, message_id: str) -> Dict[str, Any]:
+        """Get the status of a specific message."""
+        return self._model(Message, await self._request('GET', f'/messages/{message_id}'))
+
+    async def list_flow_messages(self, flow_id: str, **params) -> Dict[str, Any]:
+        """List one page of messages sent through a flow."""
+        return self._model_page(Message, await self._request('GET', f'/flows/{flow_id}/messages', params=params))
+
+    # User Management
+    async def list_users(self, **params) -> Dict[str, Any]:
+        """List one page of users."""
+        return await self._request('GET', '/users', params=params)
+
+    # Analytics
+    async def get_flow_analytics(self, flow_id: str, **params) -> Dict[str, Any]:
+        """Get analytics for a specific flow."""
+        return self._model(AnalyticsSummary, await self._request('GET', f'/flows/{flow_id}/analytics',
+                                                                 params=params))
+
+    async def get_global_analytics(self, **params) -> Dict[str, Any]:
+        """Get global analytics across all flows."""
+        return self._model(AnalyticsSummary, await self._request('GET', '/analytics', params=params))
+
+    # Vendor Management
+    async def list_vendors(self, **params) -> Dict[str, Any]:
+        """List all configured vendors."""
+        return self._model_page(Vendor, await self._request('GET', '/vendors', params=params))
+
+    async def get_vendor_health(self, vendor_id: str) -> Dict[str, Any]:
+        """Get health status for a specific vendor."""
+        return self._model(VendorHealth, await self._request('GET', f'/vendors/{vendor_id}/health'))
+
+    # Webhook Utilities
+    verify_webhook_signature = FlowForgeClient.verify_webhook_signature
+
+
+def run_sharded_campaign(api_key: str, flow_id: str, rows: Iterable[Any],
+                         base_url: str = "https://api.flowforge.com/v1",
+                         encoder: Optional[BulkPayloadBuilder] = None,
+                         shards: Optional[int] = None, batch_size: int = 100,
+                         concurrency: int = 4, task_batches: int = 50,
+                         options: Optional[Dict[str, Any]] = None,
+                         journal_path: Optional[str] = None, campaign_id: str = 'campaign',
+                         shard_key: Optional[Callable[[Any], Any]] = None,
+                         rate_limiter: Optional[SharedRateLimiter] = None,
+                         progress: Optional[Callable[[BulkSendResult], None]] = None) -> BulkSendResult:
+    """Send a campaign from several worker processes sharing one rate budget.
+    
+    Rows (messages, or recipient rows when an ``encoder`` is given) are
+    partitioned across ``shards`` processes by a stable hash of the
+    recipient, so each shard sees the same rows in the same order on every
+    run with the same shard count and its journal entries line up on a
+    resume. Each worker owns a client and connection pool and runs
+    ``send_bulk`` on tasks of ``task_batches`` batches, with at most two
+    tasks queued per shard. Results are merged in the parent, which calls
+    ``progress`` after every task.
+    """
+    shards = shards or os.cpu_count() or 1
+    if shard_key is None:
+        shard_key = (lambda row: row[0]) if encoder else (lambda message: message['recipient'])
+    settings = {
+        'flow_id': flow_id, 'encoder': encoder, 'options': options, 'batch_size': batch_size,
+        'concurrency': concurrency, 'journal_path': journal_path
+    }
+    rate_limiter = rate_limiter or SharedRateLimiter()
+    task_rows = batch_size * task_batches
+    result = BulkSendResult()
+    
+    # One single-process pool per shard pins each shard to its own worker and client
+    executors = [ProcessPoolExecutor(max_workers=1, initializer=_campaign_worker_init,
+                                     initargs=(api_key, base_url, rate_limiter, settings))
+                 for _ in range(shards)]
+    buffers = [[] for _ in range(shards)]
+    pending = [[] for _ in range(shards)]
+    tasks = [0] * shards
+    
+    def collect(shard: int):
+        future, task = pending[shard].pop(0)
+        result.merge(future.result(), shard=shard, task=task)
+        if progress:
+            progress(result)
+    
+    def dispatch(shard: int):
+        if len(pending[shard]) >= 2:
+            collect(shard)
+        task = tasks[shard]
+        tasks[shard] += 1
+        task_campaign = f"{campaign_id}:shard{shard}of{shards}:task{task}"
+        pending[shard].append((executors[shard].submit(_campaign_worker_run, buffers[shard], task_campaign), task))
+        buffers[shard] = []
+    
+    try:
+        for row in rows:
+            shard = zlib.crc32(str(shard_key(row)).encode('utf-8')) % shards
+            buffers[shard].append(row)
+            if len(buffers[shard]) >= task_rows:
+                dispatch(shard)
+        
+        for shard in range(shards):
+            if buffers[shard]:
+                dispatch(shard)
+        for shard in range(shards):
+            while pending[shard]:
+                collect(shard)
+    finally:
+        for executor in executors:
+            executor.shutdown(cancel_futures=True)
+    
+    return result
+
+
+_worker_campaign = None
+
+
+def _campaign_worker_init(api_key: str, base_url: str, rate_limiter: SharedRateLimiter,
+                          settings: Dict[str, Any]):
+    """Give each campaign worker process its own client on the shared budget."""
+    global _worker_campaign
+    client = FlowForgeClient(api_key, base_url, pool_maxsize=settings['concurrency'],
+                             rate_limiter=rate_limiter)
+    _worker_campaign = (client, settings)
+
+
+def _campaign_worker_run(rows: List[Any], task_campaign: str) -> BulkSendResult:
+    client, settings = _worker_campaign
+    journal = None
+    if settings['journal_path']:
+        journal = CampaignJournal(settings['journal_path'], task_campaign)
+    try:
+        return client.send_bulk(settings['flow_id'], rows, batch_size=settings['batch_size'],
+                                concurrency=settings['concurrency'], options=settings['options'],
+                                encoder=settings['encoder'], journal=journal)
+    finally:
+        if journal:
+            journal.close()
+
+
+class MessageStatusTracker:
+    """Follow delivery of many messages with coalesced, adaptive polling.
+    
+    Instead of one ``get_message_status`` call per message, each cycle scans
+    ``/flows/{flow_id}/messages`` once per flow (filtered by ``start_date``)
+    and matches the results against the tracked IDs. Flows with only a few
+    pending messages fall back to direct lookups. Messages that reach a
+    terminal state are dropped, and the poll interval backs off while
+    nothing changes. Once the creation time of every pending message in a
+    flow is known, the scan window starts at the oldest of them, so later
+    cycles skip records that can no longer matter. A failed lookup is
+    logged and its messages stay pending for the next cycle.
+    """
+    
+    # Message status lifecycle: queued -> processing -> sent -> delivered | failed
+    STATUS_ORDER = {'queued': 0, 'processing': 1, 'sent': 2, 'delivered': 3, 'failed': 3, 'cancelled': 3}
+    TERMINAL_STATUSES = {'delivered', 'failed', 'cancelled'}
+    
+    def __init__(self, client: FlowForgeClient, min_interval: float = 2.0,
+                 max_interval: float = 60.0, direct_lookup_threshold: int = 20,
+                 lookback: timedelta = timedelta(minutes=5)):
+        self.client = client
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.direct_lookup_threshold = direct_lookup_threshold
+        self.lookback = lookback
+        self.interval = min_interval
+        self.lookup_errors = 0
+        self._pending = {}  # flow_id -> {message_id: last known status}
+        self._since = {}    # flow_id -> earliest start_date worth scanning
+        self._created = {}  # message_id -> created_at of pending messages seen so far
+
+    @property
+    def pending(self) -> int:
+        """Number of tracked messages not yet in a terminal state."""
+        return sum(len(messages) for messages in self._pending.values())
+
+    def track(self, flow_id: str, message_ids: Iterable[str], status: str = 'queued',
+              since: Optional[datetime] = None):
+        """Start tracking messages sent through a flow.
+        
+        ``since`` should be when the messages were created (e.g. the campaign
+        start time); listing scans begin ``lookback`` before it. Without it the
+        scan starts ``lookback`` before now, which misses messages created
+        earlier than that.
+        """
+        messages = self._pending.setdefault(flow_id, {})
+        for message_id in message_ids:
+            messages.setdefault(message_id, status)
+        
+        if since is not None and since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        since = (since or datetime.now(timezone.utc)) - self.lookback
+        self._since[flow_id] = min(self._since.get(flow_id, since), since)
+
+    def _lookup(self, flow_id: str, messages: Dict[str, str]) -> Iterator[Dict[str, Any]]:
+        """Fetch current records for a flow's pending messages."""
+        if len(messages) <= self.direct_lookup_threshold:
+            for message_id in list(messages):
+                try:
+                    record = self.client.get_message_status(message_id)
+                except Exception as e:
+                    self.lookup_errors += 1
+                    logger.warning("Status lookup for message %s failed: %s", message_id, e)
+                    continue
+                yield record
+            return
+        
+        since = self._since[flow_id].isoformat()
+        try:
+            for record in self.client.iter_flow_messages(flow_id, start_date=since):
+                if record.get('message_id') in messages:
+                    yield record
+        except Exception as e:
+            self.lookup_errors += 1
+            logger.warning("Message listing for flow %s failed: %s", flow_id, e)
+
+    def _advance_since(self, flow_id: str, messages: Dict[str, str]):
+        """Move the scan window up to the oldest pending message, once all are located."""
+        created = [self._created.get(message_id) for message_id in messages]
+        if created and None not in created:
+            self._since[flow_id] = max(self._since[flow_id], min(created))
+
+    def poll_once(self) -> List[Dict[str, Any]]:
+        """Run one polling cycle and return the status transitions it observed."""
+        transitions = []
+        
+        for flow_id, messages in list(self._pending.items()):
+            for record in self._lookup(flow_id, messages):
+                message_id = record['message_id']
+                previous = messages.get(message_id)
+                status = record.get('status')
+                if previous is not None and message_id not in self._created and record.get('created_at'):
+                    created_at = datetime.fromisoformat(record['created_at'].replace('Z', '+00:00'))
+                    if created_at.tzinfo is None:
+                        created_at = created_at.replace(tzinfo=timezone.utc)
+                    self._created[message_id] = created_at
+                
+                # Listings can lag behind; never move a message backwards
+                if previous is None or status == previous:
+                    continue
+                if self.STATUS_ORDER.get(status, -1) < self.STATUS_ORDER.get(previous, -1):
+                    continue
+                
+                transitions.append({
+                    "message_id": message_id,
+                    "flow_id": flow_id,
+                    "previous_status": previous,
+                    "status": status,
+                    "message": record
+                })
+                
+                if status in self.TERMINAL_STATUSES:
+                    del messages[message_id]
+                    self._created.pop(message_id, None)
+                else:
+                    messages[message_id] = status
+            
+            if not messages:
+                del self._pending[flow_id]
+                del self._since[flow_id]
+            else:
+                self._advance_since(flow_id, messages)
+        
+        # Poll quickly while statuses are moving, back off while they are not
+        if transitions:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        
+        return transitions
+
+    def watch(self, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Yield status transitions until every message is terminal or ``timeout`` expires."""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        
+        while self.pending:
+            yield from self.poll_once()
+            
+            if not self.pending:
+                return
+            if deadline is not None and time.monotonic() + self.interval > deadline:
+                return
+            time.sleep(self.interval)
+
+
+def _distribute_weights(scores: Dict[str, float], total: int = 100, min_weight: int = 1) -> Dict[str, int]:
+    """Integer weights proportional to ``scores`` that sum exactly to ``total``.
+    
+    Uses largest-remainder rounding, and every vendor with a positive score
+    keeps at least ``min_weight`` so truncation can never starve it to zero.
+    """
+    positive = {vendor: score for vendor, score in scores.items() if score > 0}
+    if not positive:
+        return {vendor: 0 for vendor in scores}
+    if min_weight * len(positive) > total:
+        raise ValueError(f"Cannot give {len(positive)} vendors a minimum weight of {min_weight}")
+    
+    remaining = total - min_weight * len(positive)
+    score_total = sum(positive.values())
+    exact = {vendor: remaining * score / score_total for vendor, score in positive.items()}
+    weights = {vendor: min_weight + int(share) for vendor, share in exact.items()}
+    leftover = total - sum(weights.values())
+    for vendor in sorted(exact, key=lambda v: exact[v] - int(exact[v]), reverse=True)[:leftover]:
+        weights[vendor] += 1
+    return {vendor: weights.get(vendor, 0) for vendor in scores}
+
+
+class VendorWeightOptimizer:
+    """Keep a flow's ``weightedsplit`` weights tracking live vendor health.
+    
+    Each ``step`` polls ``get_vendor_health`` for every vendor in the split
+    concurrently and appends the sample to a per-vendor ring buffer of the
+    last ``history`` polls. Success rate and latency are folded into
+    time-decayed averages as they arrive, and the success rate is projected
+    ``lookahead`` seconds ahead along its recent trend, so a degrading vendor
+    loses share before its average catches up. Scores are
+    ``status factor * success ** success_exponent / cost / latency penalty``.
+    
+    The flow is only rewritten when some weight moves by at least
+    ``drift_threshold`` points, and no more often than ``min_update_interval``
+    unless a vendor has dropped out of rotation entirely.
+    """
+    
+    STATUS_FACTORS = {'healthy': 1.0, 'warning': 0.5, 'degraded': 0.5,
+                      'unknown': 0.25, 'critical': 0.0, 'down': 0.0}
+    
+    def __init__(self, client: FlowForgeClient, flow_id: str, node_id: Optional[str] = None,
+                 poll_interval: float = 5.0, history: int = 120, half_life: float = 30.0,
+                 lookahead: float = 60.0, success_exponent: float = 4.0, latency_scale_ms: float = 1000.0,
+                 drift_threshold: int = 5, min_update_interval: float = 10.0, min_weight: int = 1):
+        self.client = client
+        self.flow_id = flow_id
+        self.poll_interval = poll_interval
+        self.half_life = half_life
+        self.lookahead = lookahead
+        self.success_exponent = success_exponent
+        self.latency_scale_ms = latency_scale_ms
+        self.drift_threshold = drift_threshold
+        self.min_update_interval = min_update_interval
+        self.min_weight = min_weight
+        self.updates = 0
+        
+        flow = client.get_flow(flow_id)
+        self._configuration = json.loads(json.dumps(flow['configuration']))  # Private, mutable copy
+        splits = [n for n in self._configuration['nodes']
+                  if n['type'] == 'weightedsplit' and (node_id is None or n['id'] == node_id)]
+        if not splits:
+            raise ValueError(f"Flow {flow_id} has no weightedsplit node {node_id or ''}".strip())
+        self._node = splits[0]
+        self.weights = {w['vendorId']: w['weight'] for w in self._node['data']['weights']}
+        
+        vendors = client.list_vendors(channel=flow.get('channel'))['data']
+        self.costs = {v['id']: v.get('pricing', {}).get('cost_per_message') or 1.0 for v in vendors}
+        
+        # vendor -> ring buffer of (monotonic time, success %, latency ms) and decayed averages
+        self.samples = {vendor: deque(maxlen=history) for vendor in self.weights}
+        self._averages = {}
+        self._status = {vendor: 'unknown' for vendor in self.weights}
+        self._failures = {vendor: 0 for vendor in self.weights}
+        self._pool = ThreadPoolExecutor(max_workers=min(32, len(self.weights)) or 1)
+        self._last_update = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def _fetch(self, vendor: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self.client.get_vendor_health(vendor)
+        except Exception as e:
+            logger.warning("Health check for %s failed: %s", vendor, e)
+            return None
+    
+    def _observe(self, vendor: str, health: Optional[Dict[str, Any]], now: float):
+        if health is None:
+            self._failures[vendor] += 1
+            if self._failures[vendor] >= 3:
+                self._status[vendor] = 'unknown'
+            return
+        
+        metrics = health.get('metrics', {})
+        success = metrics.get('success_rate_1h', metrics.get('success_rate_24h'))
+        latency = metrics.get('avg_response_time_ms')
+        self._failures[vendor] = 0
+        self._status[vendor] = health.get('status', 'unknown')
+        if success is None:
+            return
+        latency = latency if latency is not None else self.latency_scale_ms
+        self.samples[vendor].append((now, success, latency))
+        
+        previous = self._averages.get(vendor)
+        if previous is None:
+            self._averages[vendor] = (now, success, latency)
+            return
+        alpha = 1 - 0.5 ** ((now - previous[0]) / self.half_life)
+        self._averages[vendor] = (now, previous[1] + alpha * (success - previous[1]),
+                                  previous[2] + alpha * (latency - previous[2]))
+    
+    def _trend(self, vendor: str) -> float:
+        """Least-squares slope of the success rate over the ring buffer, in %/s."""
+        samples = self.samples[vendor]
+        if len(samples) < 3:
+            return 0.0
+        t0 = samples[0][0]
+        n = len(samples)
+        mean_t = sum(t - t0 for t, _, _ in samples) / n
+        mean_s = sum(s for _, s, _ in samples) / n
+        variance = sum((t - t0 - mean_t) ** 2 for t, _, _ in samples)
+        if variance == 0:
+            return 0.0
+        return sum((t - t0 - mean_t) * (s - mean_s) for t, s, _ in samples) / variance
+    
+    def scores(self) -> Dict[str, float]:
+        """Current routing score per vendor (0 takes it out of rotation)."""
+        scores = {}
+        for vendor in self.weights:
+            average = self._averages.get(vendor)
+            status_factor = self.STATUS_FACTORS.get(self._status[vendor], 0.25)
+            if average is None or status_factor == 0:
+                scores[vendor] = 0.0
+                continue
+            _, success, latency = average
+            projected = min(100.0, max(0.0, success + self._trend(vendor) * self.lookahead))
+            scores[vendor] = (status_factor * (projected / 100) ** self.success_exponent
+                              / self.costs.get(vendor, 1.0) / (1 + latency / self.latency_scale_ms))
+        return scores
+    
+    def step(self) -> Optional[Dict[str, int]]:
+        """Poll once and push new weights if they drifted; returns them when pushed."""
+        vendors = list(self.weights)
+        now = time.monotonic()
+        for vendor, health in zip(vendors, self._pool.map(self._fetch, vendors)):
+            self._observe(vendor, health, now)
+        
+        target = _distribute_weights(self.scores(), min_weight=self.min_weight)
+        if not any(target.values()):
+            logger.warning("No vendor in rotation is healthy; keeping current weights")
+            return None
+        
+        drift = max(abs(target[v] - self.weights[v]) for v in vendors)
+        dropped = any(target[v] == 0 < self.weights[v] for v in vendors)
+        if drift < self.drift_threshold or (
+                not dropped and now - self._last_update < self.min_update_interval):
+            return None
+        
+        self._node['data']['weights'] = [{"vendorId": v, "weight": target[v]} for v in vendors]
+        self.client.update_flow(self.flow_id, {"configuration": self._configuration})
+        logger.info("Updated routing weights for %s: %s", self.flow_id, target)
+        self.weights = target
+        self._last_update = now
+        self.updates += 1
+        return target
+    
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.step()
+            except Exception as e:
+                logger.error("Vendor weight update failed: %s", e)
+            self._stop.wait(max(0.0, self.poll_interval - (time.monotonic() - started)))
+    
+    def start(self) -> 'VendorWeightOptimizer':
+        """Start polling in a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"vendor-weights-{self.flow_id}")
+        self._thread.start()
+        return self
+    
+    def stop(self, timeout: Optional[float] = None):
+        """Stop polling and release the health-check workers."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._pool.shutdown(wait=False)
+
+
+# Operators supported in filter/conditional criteria, matching the flow builder
+CRITERIA_OPERATORS = {
+    'equals': operator.eq,
+    'not_equals': operator.ne,
+    'contains': lambda actual, expected: expected in actual,
+    'not_contains': lambda actual, expected: expected not in actual,
+    'starts_with': lambda actual, expected: str(actual).startswith(expected),
+    'ends_with': lambda actual, expected: str(actual).endswith(expected),
+    'greater_than': operator.gt,
+    'greater_than_or_equal': operator.ge,
+    'less_than': operator.lt,
+    'less_than_or_equal': operator.le,
+    'in': lambda actual, expected: actual in expected,
+    'not_in': lambda actual, expected: actual not in expected,
+    'is_empty': lambda actual, expected: actual in (None, ''),
+    'is_not_empty': lambda actual, expected: actual not in (None, ''),
+    'is_true': lambda actual, expected: actual is True,
+    'is_false': lambda actual, expected: actual is False,
+    'regex': lambda actual, expected: re.search(expected, str(actual)) is not None
+}
+
+CHANNEL_NODE_TYPES = {'sms', 'whatsapp', 'email', 'voice', 'rcs'}
+
+
+def _compile_criterion(criterion: Dict[str, Any]) -> Callable[[Dict[str, Any]], bool]:
+    """Compile one ``{field, operator, value}`` criterion into a predicate."""
+    compare = CRITERIA_OPERATORS[criterion.get('operator', 'equals')]
+    field_name = criterion['field']
+    # Criteria use camelCase fields; simulate_flow test parameters use snake_case
+    snake_name = re.sub(r'(?<!^)(?=[A-Z])', '_', field_name).lower()
+    expected = criterion.get('value')
+    
+    def predicate(scenario: Dict[str, Any]) -> bool:
+        actual = scenario.get(field_name, scenario.get(snake_name))
+        try:
+            return bool(compare(actual, expected))
+        except TypeError:
+            return False
+    
+    return predicate
+
+
+class FlowSimulator:
+    """Offline evaluator for a flow ``configuration``.
+    
+    The node/edge graph is compiled once into an adjacency map with
+    precompiled criteria and cumulative routing weights. Scenarios use the
+    same shape as ``simulate_flow`` test parameters, including
+    ``overrides.vendor_status`` and ``overrides.quotas``. Weighted splits
+    pick vendors deterministically from ``message_id``, so runs are
+    repeatable in CI.
+    """
+    
+    MAX_STEPS = 1000
+    
+    def __init__(self, configuration: Dict[str, Any]):
+        self.nodes = {node['id']: node for node in configuration.get('nodes', [])}
+        self.edges = {}  # node_id -> [(source_handle, target_id)]
+        for edge in configuration.get('edges', []):
+            self.edges.setdefault(edge['source'], []).append((edge.get('sourceHandle'), edge['target']))
+        
+        self.start_id = next((n for n, node in self.nodes.items() if node['type'] == 'start'), None)
+        if self.start_id is None:
+            raise ValueError("Flow configuration has no start node")
+        
+        self.predicates = {}
+        self.weights = {}
+        for node_id, node in self.nodes.items():
+            data = node.get('data', {})
+            if 'criteria' in data:
+                self.predicates[node_id] = [_compile_criterion(c) for c in data['criteria']]
+            if node['type'] == 'weightedsplit':
+                cumulative, total = [], 0
+                for entry in data.get('weights', []):
+                    total += entry['weight']
+                    cumulative.append((total, entry['vendorId']))
+                fallback_order = [entry['vendorId'] for entry in
+                                  sorted(data.get('weights', []), key=lambda e: -e['weight'])]
+                self.weights[node_id] = (cumulative, total, data.get('fallbackEnabled', False), fallback_order)
+
+    def _next(self, node_id: str, handle: Optional[str] = None) -> Optional[str]:
+        """Follow the edge for ``handle``, or the default edge when there is none."""
+        targets = self.edges.get(node_id, [])
+        for source_handle, target in targets:
+            if source_handle == handle:
+                return target
+        if handle in (None, 'success', 'true'):
+            return next((t for h, t in targets if h in (None, 'success', 'true')), None)
+        return None
+
+    @staticmethod
+    def _vendor_available(vendor_id: str, overrides: Dict[str, Any]) -> bool:
+        status = overrides.get('vendor_status', {}).get(vendor_id, 'active')
+        quota = overrides.get('quotas', {}).get(vendor_id)
+        return status not in ('down', 'inactive') and quota != 0
+
+    def _pick_vendor(self, node_id: str, scenario: Dict[str, Any], overrides: Dict[str, Any]) -> Optional[str]:
+        """Pick a vendor from a weighted split, falling back in weight order if allowed."""
+        cumulative, total, fallback_enabled, fallback_order = self.weights[node_id]
+        if total <= 0:
+            return None
+        
+        point = zlib.crc32(str(scenario.get('message_id', '')).encode('utf-8')) % total
+        chosen = next(vendor for bound, vendor in cumulative if point < bound)
+        if self._vendor_available(chosen, overrides):
+            return chosen
+        if not fallback_enabled:
+            return None
+        return next((v for v in fallback_order if self._vendor_available(v, overrides)), None)
+
+    def run(self, scenario: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute the flow for one scenario and return the path and terminal state."""
+        overrides = scenario.get('overrides', {})
+        path = []
+        candidates = []
+        selected_vendor = None
+        node_id = self.start_id
+        
+        while node_id is not None and len(path) < self.MAX_STEPS:
+            node = self.nodes.get(node_id)
+            if node is None:
+                return self._result(path, 'failed', 'dangling_edge', selected_vendor)
+            
+            path.append(node_id)
+            node_type = node['type']
+            data = node.get('data', {})
+            handle = None
+            
+            if node_type == 'terminal':
+                return self._result(path, 'success', data.get('state', 'sent'), selected_vendor)
+            
+            elif node_type == 'filter':
+                matched = all(p(scenario) for p in self.predicates.get(node_id, []))
+                if matched != (data.get('action', 'allow') == 'allow'):
+                    return self._result(path, 'filtered', 'filtered', selected_vendor)
+            
+            elif node_type == 'conditional':
+                matched = all(p(scenario) for p in self.predicates.get(node_id, []))
+                handle = 'true' if matched else 'false'
+            
+            elif node_type in CHANNEL_NODE_TYPES:
+                candidates = data.get('selectedVendors', [])
+                if candidates and not any(self._vendor_available(v, overrides) for v in candidates):
+                    handle = 'failure'
+            
+            elif node_type == 'weightedsplit':
+                selected_vendor = self._pick_vendor(node_id, scenario, overrides)
+                if selected_vendor is None:
+                    handle = 'failure'
+            
+            next_id = self._next(node_id, handle)
+            if next_id is None and handle == 'failure':
+                return self._result(path, 'failed', 'no_vendor_available', selected_vendor)
+            node_id = next_id
+        
+        if selected_vendor is None:
+            selected_vendor = next((v for v in candidates if self._vendor_available(v, overrides)), None)
+        final_status = 'failed' if node_id is not None else 'success'
+        return self._result(path, final_status, 'max_steps' if node_id is not None else None, selected_vendor)
+
+    @staticmethod
+    def _result(path: List[str], final_status: str, terminal_state: Optional[str],
+                selected_vendor: Optional[str]) -> Dict[str, Any]:
+        return {
+            "path": path,
+            "final_status": final_status,
+            "terminal_state": terminal_state,
+            "selected_vendor": selected_vendor
+        }
+
+    def run_batch(self, scenarios: Iterable[Dict[str, Any]], processes: Optional[int] = None,
+                  chunk_size: int = 1000) -> List[Dict[str, Any]]:
+        """Run many scenarios in-process, or across a process pool when ``processes`` is set."""
+        if not processes:
+            return [self.run(scenario) for scenario in scenarios]
+        
+        # Workers compile their own copy; compiled predicates are not picklable
+        configuration = {
+            'nodes': list(self.nodes.values()),
+            'edges': [{'source': source, 'target': target, 'sourceHandle': handle}
+                      for source, targets in self.edges.items() for handle, target in targets]
+        }
+        results = []
+        with ProcessPoolExecutor(max_workers=processes, initializer=_simulator_worker_init,
+                                 initargs=(configuration,)) as pool:
+            for chunk_results in pool.map(_simulator_worker_run, _chunked(scenarios, chunk_size)):
+                results.extend(chunk_results)
+        return results
+
+
+_worker_simulator = None
+
+
+def _simulator_worker_init(configuration: Dict[str, Any]):
+    """Compile the flow once per worker process."""
+    global _worker_simulator
+    _worker_simulator = FlowSimulator(configuration)
+
+
+def _simulator_worker_run(scenarios: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [_worker_simulator.run(scenario) for scenario in scenarios]
+
+
+OPENAPI_SPEC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'openapi.yaml')
+
+# Node types these examples use that the OpenAPI FlowNode enum does not list yet
+SDK_NODE_TYPES = {'weightedsplit', 'filter', 'analytics'}
+
+JSON_SCHEMA_TYPES = {
+    'string': str, 'integer': int, 'number': (int, float),
+    'boolean': bool, 'object': dict, 'array': list
+}
+
+
+def _compile_schema(schema: Dict[str, Any], components: Dict[str, Any]) -> Callable[[Any, str, List[str]], None]:
+    """Compile an OpenAPI schema into a validator that appends errors to a list."""
+    if '$ref' in schema:
+        return _compile_schema(components[schema['$ref'].rsplit('/', 1)[-1]], components)
+    
+    type_name = schema.get('type')
+    expected = JSON_SCHEMA_TYPES.get(type_name)
+    nullable = schema.get('nullable', False)
+    enum = frozenset(schema['enum']) if 'enum' in schema else None
+    required = tuple(schema.get('required', ()))
+    properties = {name: _compile_schema(prop, components)
+                  for name, prop in schema.get('properties', {}).items()}
+    items = _compile_schema(schema['items'], components) if 'items' in schema else None
+    
+    def validate(value: Any, where: str, errors: List[str]):
+        if value is None:
+            if not nullable:
+                errors.append(f"{where}: must not be null")
+            return
+        if expected is not None and (not isinstance(value, expected)
+                                     or (isinstance(value, bool) and expected is not bool)):
+            errors.append(f"{where}: expected {type_name}, got {type(value).__name__}")
+            return
+        if enum is not None and value not in enum:
+            errors.append(f"{where}: {value!r} is not one of {sorted(enum)}")
+        if isinstance(value, dict):
+            for name in required:
+                if name not in value:
+                    errors.append(f"{where}.{name}: required")
+            for name, check in properties.items():
+                if name in value:
+                    check(value[name], f"{where}.{name}", errors)
+        if items is not None and isinstance(value, list):
+            for i, item in enumerate(value):
+                items(item, f"{where}[{i}]", errors)
+    
+    return validate
 
-    def _request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
-        """Make an API request with error handling and retry logic."""
-        url = f"{self.base_url}{endpoint}"
+
+class FlowValidator:
+    """Local validation of flow configurations before they reach the API.
+    
+    Graph checks always run: unique node IDs, a single start node, edges
+    that point at existing nodes, nodes reachable from the start, and
+    routing weights (``weightedsplit`` nodes and weighted ``routingConfig``)
+    that sum to 100. ``from_openapi`` additionally compiles the request
+    schemas in openapi.yaml into validators once, so checking a flow costs
+    microseconds rather than a round trip.
+    """
+    
+    def __init__(self, schemas: Optional[Dict[str, Any]] = None):
+        self._check_schema = _compile_schema(schemas['FlowConfiguration'], schemas) if schemas else None
+    
+    @classmethod
+    def from_openapi(cls, path: str = OPENAPI_SPEC_PATH,
+                     extra_node_types: Iterable[str] = SDK_NODE_TYPES) -> 'FlowValidator':
+        """Build a validator from the OpenAPI spec (requires ``pyyaml``)."""
+        import yaml
         
-        for attempt in range(3):  # Max 3 attempts
-            try:
-                response = self.session.request(method, url, **kwargs)
-                
-                # Handle rate limiting
-                if response.status_code == 429:
-                    reset_time = int(response.headers.get('X-RateLimit-Reset', 0))
-                    wait_time = max(0, reset_time - int(time.time()))
-                    
-                    if wait_time > 0:
-                        print(f"Rate limited. Waiting {wait_time} seconds...")
-                        time.sleep(wait_time)
-                        continue
-                
-                response.raise_for_status()
-                return response.json()
+        with open(path) as f:
+            schemas = yaml.safe_load(f)['components']['schemas']
+        node_type = schemas['FlowNode']['properties']['type']
+        known = node_type.get('enum', [])
+        node_type['enum'] = known + sorted(set(extra_node_types) - set(known))
+        return cls(schemas)
+    
+    def validate(self, configuration: Dict[str, Any]) -> List[str]:
+        """Return every problem found in a configuration (empty when valid)."""
+        errors = []
+        if self._check_schema is not None:
+            self._check_schema(configuration, 'configuration', errors)
+            if errors:
+                return errors
+        
+        nodes = configuration.get('nodes', [])
+        node_ids = set()
+        for i, node in enumerate(nodes):
+            node_id = node.get('id')
+            if not node_id:
+                errors.append(f"nodes[{i}]: missing id")
+            elif node_id in node_ids:
+                errors.append(f"nodes[{i}]: duplicate id {node_id!r}")
+            node_ids.add(node_id)
+        
+        starts = [node['id'] for node in nodes if node.get('type') == 'start']
+        if len(starts) != 1:
+            errors.append(f"expected exactly one start node, found {len(starts)}")
+        
+        adjacency = {}
+        for i, edge in enumerate(configuration.get('edges', [])):
+            source, target = edge.get('source'), edge.get('target')
+            for end, node_id in (('source', source), ('target', target)):
+                if node_id not in node_ids:
+                    errors.append(f"edges[{i}] ({edge.get('id')}): dangling {end} {node_id!r}")
+            adjacency.setdefault(source, []).append(target)
+        
+        if len(starts) == 1:
+            reached, frontier = {starts[0]}, [starts[0]]
+            while frontier:
+                for target in adjacency.get(frontier.pop(), ()):
+                    if target not in reached:
+                        reached.add(target)
+                        frontier.append(target)
+            for node in nodes:
+                if node.get('id') and node['id'] not in reached:
+                    errors.append(f"node {node['id']!r} is unreachable from {starts[0]!r}")
+        
+        for node in nodes:
+            data = node.get('data') or {}
+            weights = None
+            if node.get('type') == 'weightedsplit':
+                weights = [entry.get('weight', 0) for entry in data.get('weights', [])]
+            elif (data.get('routingConfig') or {}).get('mode') == 'weighted':
+                weights = [entry.get('weight', 0) for entry in data['routingConfig'].get('vendors', [])]
+            if weights is not None:
+                if not all(isinstance(w, (int, float)) and not isinstance(w, bool) for w in weights):
+                    errors.append(f"node {node.get('id')!r}: routing weights must be numbers")
+                    continue
+                if any(w < 0 for w in weights):
+                    errors.append(f"node {node.get('id')!r}: negative routing weight")
+                if sum(weights) != 100:
+                    errors.append(f"node {node.get('id')!r}: routing weights sum to {sum(weights)}, not 100")
+        return errors
+    
+    def check(self, configuration: Dict[str, Any]):
+        """Raise ValueError listing every problem if the configuration is invalid."""
+        errors = self.validate(configuration)
+        if errors:
+            raise ValueError("Invalid flow configuration:\n  " + "\n  ".join(errors))
+
+
+@lru_cache(maxsize=None)
+def _openapi_flow_validator() -> FlowValidator:
+    """The OpenAPI-backed validator, compiled once per process."""
+    return FlowValidator.from_openapi()
+
+
+def diff_flow_configuration(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Dict[str, List[str]]]:
+    """Node and edge IDs added, removed or changed between two configurations."""
+    diff = {}
+    for kind in ('nodes', 'edges'):
+        before = {item.get('id'): item for item in old.get(kind, [])}
+        after = {item.get('id'): item for item in new.get(kind, [])}
+        diff[kind] = {
+            'added': [i for i in after if i not in before],
+            'removed': [i for i in before if i not in after],
+            'changed': [i for i in after if i in before and after[i] != before[i]]
+        }
+    return diff
+
+
+class WebhookSignatureVerifier:
+    """Reusable HMAC-SHA256 verifier for ``X-FlowForge-Signature`` headers.
+    
+    The keyed HMAC state is built once from the secret and copied per
+    request, so verification needs neither a client instance nor repeated
+    key setup.
+    """
+    
+    def __init__(self, secret: str):
+        self._prototype = hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+
+    def verify(self, payload: bytes, signature: Optional[str]) -> bool:
+        """Check a raw request body against its signature header."""
+        if not signature:
+            return False
+        mac = self._prototype.copy()
+        mac.update(payload)
+        return hmac.compare_digest(mac.hexdigest(), signature.replace('sha256=', ''))
+
+
+class RotatingBloomFilter:
+    """Time-bounded Bloom filter with fixed memory.
+    
+    Keys are remembered for between one and ``generations`` windows: each
+    generation covers ``window`` seconds and the oldest one is cleared when
+    a new window starts. Passing ``path`` backs the bit arrays with an
+    mmap'd file so the filter survives restarts. The file records the bit
+    count, hash count and generations it was built with; a file written
+    with different parameters is cleared rather than misread.
+    """
+    
+    # magic, num_bits, num_hashes, generations
+    LAYOUT = struct.Struct('<8sQII')
+    MAGIC = b'FFBLOOM1'
+    
+    def __init__(self, capacity: int, error_rate: float = 1e-4, window: float = 86400,
+                 generations: int = 2, path: Optional[str] = None):
+        self.window = window
+        self.generations = generations
+        self.num_bits = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._generation_bytes = (self.num_bits + 7) // 8
+        # Layout, then one start timestamp per generation
+        self._header_bytes = self.LAYOUT.size + 8 * generations
+        size = self._header_bytes + self._generation_bytes * generations
+        layout = self.LAYOUT.pack(self.MAGIC, self.num_bits, self.num_hashes, generations)
+        
+        if path:
+            with open(path, 'a+b') as f:
+                f.seek(0)
+                header = f.read(self.LAYOUT.size)
+                if f.seek(0, 2) != size or header != layout:
+                    # Bits laid out for other parameters would yield false duplicates
+                    f.truncate(0)
+                    f.truncate(size)
+            self._file = open(path, 'r+b')
+            self._bits = mmap.mmap(self._file.fileno(), size)
+        else:
+            self._file = None
+            self._bits = bytearray(size)
+        self._bits[:self.LAYOUT.size] = layout
+        
+        starts = [struct.unpack_from('d', self._bits, self._start_offset(g))[0] for g in range(generations)]
+        self._current = starts.index(max(starts))
+        if starts[self._current] == 0:
+            struct.pack_into('d', self._bits, self._start_offset(self._current), time.time())
+
+    def _start_offset(self, generation: int) -> int:
+        return self.LAYOUT.size + 8 * generation
+
+    def _positions(self, key: str) -> List[int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def _rotate(self):
+        """Start a new generation once the current one is a full window old."""
+        now = time.time()
+        started = struct.unpack_from('d', self._bits, self._start_offset(self._current))[0]
+        if now - started < self.window:
+            return
+        
+        self._current = (self._current + 1) % self.generations
+        offset = self._header_bytes + self._current * self._generation_bytes
+        self._bits[offset:offset + self._generation_bytes] = bytes(self._generation_bytes)
+        struct.pack_into('d', self._bits, self._start_offset(self._current), now)
+
+    def check_and_add(self, key: str) -> bool:
+        """Return True if ``key`` was (probably) seen before, recording it either way."""
+        self._rotate()
+        positions = self._positions(key)
+        
+        seen = False
+        for g in range(self.generations):
+            base = self._header_bytes + g * self._generation_bytes
+            if all(self._bits[base + (p >> 3)] & (1 << (p & 7)) for p in positions):
+                seen = True
+                break
+        
+        if not seen:
+            base = self._header_bytes + self._current * self._generation_bytes
+            for p in positions:
+                self._bits[base + (p >> 3)] |= 1 << (p & 7)
+        return seen
+
+    def close(self):
+        if self._file is not None:
+            self._bits.flush()
+            self._bits.close()
+            self._file.close()
+
+
+class WebhookEventDeduplicator:
+    """Drop duplicate webhook deliveries and release message events in lifecycle order.
+    
+    Message deliveries are keyed on event type plus message ID, other
+    events on event type, flow ID and delivery ID (or ``timestamp``), and
+    checked against a rotating Bloom filter, so memory stays constant however many
+    events arrive; the false-positive rate bounds how many genuine events
+    can be mistaken for duplicates. A bounded LRU remembers the last
+    lifecycle state released per message: stale events are dropped, and an
+    event that arrives ahead of its predecessor (e.g. ``message.delivered``
+    before ``message.sent``) is held for up to ``reorder_window`` seconds.
+    """
+    
+    # Message lifecycle: sent -> delivered | failed
+    LIFECYCLE_RANK = {'message.sent': 1, 'message.delivered': 2, 'message.failed': 2}
+    
+    def __init__(self, capacity: int = 10_000_000, error_rate: float = 1e-4,
+                 window: float = 86400, lru_size: int = 100_000,
+                 reorder_window: float = 30.0, path: Optional[str] = None):
+        self.bloom = RotatingBloomFilter(capacity, error_rate, window, path=path)
+        self.lru_size = lru_size
+        self.reorder_window = reorder_window
+        self.stats = {"duplicates": 0, "stale": 0, "reordered": 0}
+        self._released = OrderedDict()  # message_id -> last released lifecycle rank
+        self._held = OrderedDict()      # message_id -> [(deadline, rank, event)]
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def event_key(event: Dict[str, Any]) -> str:
+        data = event.get('data', {})
+        if data.get('message_id'):
+            return f"{event.get('event')}:{data['message_id']}"
+        # Flow events can legitimately repeat for the same flow (activated,
+        # deactivated, activated again), so key them on the delivery itself.
+        delivery = event.get('delivery_id') or event.get('id') or event.get('timestamp')
+        return f"{event.get('event')}:{data.get('flow_id')}:{delivery}"
+
+    def _release(self, message_id: str, rank: int, event: Dict[str, Any], ready: List[Dict[str, Any]]):
+        ready.append(event)
+        self._released[message_id] = rank
+        self._released.move_to_end(message_id)
+        if len(self._released) > self.lru_size:
+            self._released.popitem(last=False)
+
+    def _release_held(self, message_id: str, ready: List[Dict[str, Any]], force: bool = False):
+        """Release held events that are now next in line (or all of them when forced)."""
+        held = self._held.get(message_id)
+        while held:
+            held.sort(key=lambda h: h[1])
+            _, rank, event = held[0]
+            if not force and rank != self._released.get(message_id, 0) + 1:
+                break
+            held.pop(0)
+            if rank > self._released.get(message_id, 0):
+                self._release(message_id, rank, event, ready)
+        if not held:
+            self._held.pop(message_id, None)
+
+    def process(self, events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Filter a batch of events, returning those ready for handlers in order."""
+        ready = []
+        with self._lock:
+            for event in events:
+                if self.bloom.check_and_add(self.event_key(event)):
+                    self.stats['duplicates'] += 1
+                    continue
                 
-            except requests.exceptions.RequestException as e:
-                if attempt == 2:  # Last attempt
-                    raise Exception(f"API request failed after 3 attempts: {str(e)}")
+                rank = self.LIFECYCLE_RANK.get(event.get('event'))
+                message_id = event.get('data', {}).get('message_id')
+                if rank is None or message_id is None:
+                    ready.append(event)
+                    continue
                 
-                # Exponential backoff
-                wait_time = (2 ** attempt) * 1000 / 1000  # Convert to seconds
-                print(f"Attempt {attempt + 1} failed. Retrying in {wait_time}s...")
-                time.sleep(wait_time)
+                last = self._released.get(message_id, 0)
+                if rank <= last:
+                    self.stats['stale'] += 1
+                elif rank == last + 1:
+                    self._release(message_id, rank, event, ready)
+                    self._release_held(message_id, ready)
+                else:
+                    self.stats['reordered'] += 1
+                    deadline = time.monotonic() + self.reorder_window
+                    self._held.setdefault(message_id, []).append((deadline, rank, event))
+                    if len(self._held) > self.lru_size:
+                        oldest = next(iter(self._held))
+                        self._release_held(oldest, ready, force=True)
+        return ready
 
-    # Flow Management Methods
-    def list_flows(self, **params) -> Dict[str, Any]:
-        """List all flows with optional filtering."""
-        return self._request('GET', '/flows', params=params)
+    def release_expired(self, force: bool = False) -> List[Dict[str, Any]]:
+        """Release held events whose predecessor never arrived in time."""
+        ready = []
+        now = time.monotonic()
+        with self._lock:
+            for message_id in list(self._held):
+                if force or min(h[0] for h in self._held[message_id]) <= now:
+                    self._release_held(message_id, ready, force=True)
+        return ready
 
-    def get_flow(self, flow_id: str) -> Dict[str, Any]:
-        """Get a specific flow by ID."""
-        return self._request('GET', f'/flows/{flow_id}')
 
-    def create_flow(self, flow_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Create a new flow."""
-        return self._request('POST', '/flows', json=flow_data)
+class WebhookReceiver:
+    """Standalone webhook ingestion with a bounded queue and batching workers.
+    
+    Requests are only verified, parsed and enqueued before being
+    acknowledged with 202; worker threads drain the queue, group events by
+    type and hand each batch to the sinks registered with ``route``. When
+    the queue stays full for ``enqueue_timeout`` seconds the request is
+    rejected with 503 and ``Retry-After``, letting the FlowForge retry
+    policy absorb the spike instead of requests timing out. An optional
+    ``deduplicator`` filters and reorders events before they are batched.
+    
+    Each worker has its own share of ``max_queue``, and events are routed by
+    message ID (or flow ID), so every event for one message is handled by
+    the same worker. Without a deduplicator, batches of different types
+    flush independently and only per-type order holds. With one, each worker
+    flushes its events in release order, as consecutive same-type batches,
+    so handlers see ``message.sent`` before ``message.delivered``.
+    """
+    
+    def __init__(self, secret: str, max_queue: int = 10000, workers: int = 4,
+                 batch_size: int = 100, flush_interval: float = 0.5,
+                 enqueue_timeout: float = 1.0,
+                 deduplicator: Optional[WebhookEventDeduplicator] = None):
+        self.verifier = WebhookSignatureVerifier(secret)
+        self.deduplicator = deduplicator
+        self.queues = [queue.Queue(maxsize=max(1, max_queue // workers)) for _ in range(workers)]
+        self.workers = workers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.stats = {"accepted": 0, "rejected": 0, "throttled": 0, "processed": 0, "sink_errors": 0,
+                      "event_errors": 0}
+        self._sinks = {}  # event type (or '*') -> [callable(List[event])]
+        self._stop = threading.Event()
+        self._threads = []
+        self._stats_lock = threading.Lock()
 
-    def update_flow(self, flow_id: str, updates: Dict[str, Any]) -> Dict[str, Any]:
-        """Update an existing flow."""
-        return self._request('PUT', f'/flows/{flow_id}', json=updates)
+    def route(self, event_type: str, sink: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        """Register a batch sink for an event type (``'*'`` matches every event).
+        
+        Usable directly or as a decorator.
+        """
+        def register(fn):
+            self._sinks.setdefault(event_type, []).append(fn)
+            return fn
+        return register(sink) if sink is not None else register
 
-    def activate_flow(self, flow_id: str) -> Dict[str, Any]:
-        """Activate a flow."""
-        return self._request('POST', f'/flows/{flow_id}/activate')
+    def _count(self, key: str, amount: int = 1):
+        with self._stats_lock:
+            self.stats[key] += amount
 
-    def deactivate_flow(self, flow_id: str) -> Dict[str, Any]:
-        """Deactivate a flow."""
-        return self._request('POST', f'/flows/{flow_id}/deactivate')
+    def _parse(self, payload: bytes, signature: Optional[str]) -> Tuple[Optional[Dict[str, Any]], int, Dict[str, Any]]:
+        """Verify and decode a delivery; returns ``(event, status, body)``."""
+        if not self.verifier.verify(payload, signature):
+            self._count('rejected')
+            return None, 401, {'error': 'Invalid signature'}
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            self._count('rejected')
+            return None, 400, {'error': 'Invalid JSON payload'}
+        if not isinstance(event, dict):
+            self._count('rejected')
+            return None, 400, {'error': 'Webhook payload must be a JSON object'}
+        return event, 202, {'status': 'received'}
 
-    def simulate_flow(self, flow_id: str, test_params: Dict[str, Any]) -> Dict[str, Any]:
-        """Simulate flow execution."""
-        return self._request('POST', f'/flows/{flow_id}/simulate', 
-                           json={'test_parameters': test_params})
+    def submit(self, payload: bytes, signature: Optional[str]) -> Tuple[int, Dict[str, Any]]:
+        """Verify and enqueue one delivery, blocking at most ``enqueue_timeout``."""
+        event, status, body = self._parse(payload, signature)
+        if event is None:
+            return status, body
+        try:
+            self._queue_for(event).put(event, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self._count('throttled')
+            return 503, {'error': 'Receiver busy, retry later'}
+        self._count('accepted')
+        return status, body
 
-    # Message Operations
-    def send_message(self, flow_id: str, message_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Send a single message through a flow."""
-        return self._request('POST', f'/flows/{flow_id}/messages', json=message_data)
+    async def submit_async(self, payload: bytes, signature: Optional[str]) -> Tuple[int, Dict[str, Any]]:
+        """Like ``submit`` but waits for queue space without blocking the event loop."""
+        event, status, body = self._parse(payload, signature)
+        if event is None:
+            return status, body
+        
+        target = self._queue_for(event)
+        deadline = time.monotonic() + self.enqueue_timeout
+        while True:
+            try:
+                target.put_nowait(event)
+                break
+            except queue.Full:
+                if time.monotonic() >= deadline:
+                    self._count('throttled')
+                    return 503, {'error': 'Receiver busy, retry later'}
+                await asyncio.sleep(0.01)
+        self._count('accepted')
+        return status, body
 
-    def send_bulk_messages(self, flow_id: str, messages: List[Dict[str, Any]], 
-                          options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """Send multiple messages in bulk."""
-        payload = {'messages': messages}
-        if options:
-            payload['options'] = options
-        return self._request('POST', f'/flows/{flow_id}/messages/bulk', json=payload)
+    def _queue_for(self, event: Dict[str, Any]) -> queue.Queue:
+        """The worker queue for an event, fixed per message (or flow) ID."""
+        data = event.get('data')
+        key = (data.get('message_id') or data.get('flow_id')) if isinstance(data, dict) else None
+        return self.queues[zlib.crc32(str(key).encode('utf-8')) % len(self.queues)]
 
-    def get_message_status(self, message_id: str) -> Dict[str, Any]:
-        """Get the status of a specific message."""
-        return self._request('GET', f'/messages/{message_id}')
+    def _flush(self, event_type: str, events: List[Dict[str, Any]]):
+        sinks = self._sinks.get(event_type, []) + self._sinks.get('*', [])
+        for sink in sinks:
+            try:
+                sink(events)
+            except Exception as e:
+                self._count('sink_errors')
+                logger.exception("Webhook sink failed for %s: %s", event_type, e)
+        self._count('processed', len(events))
 
-    # Analytics
-    def get_flow_analytics(self, flow_id: str, **params) -> Dict[str, Any]:
-        """Get analytics for a specific flow."""
-        return self._request('GET', f'/flows/{flow_id}/analytics', params=params)
+    def _flush_in_order(self, events: List[Dict[str, Any]]):
+        """Flush events in order, as consecutive runs of the same type."""
+        for event_type, run in groupby(events, key=lambda event: event.get('event', 'unknown')):
+            self._flush(event_type, list(run))
 
-    def get_global_analytics(self, **params) -> Dict[str, Any]:
-        """Get global analytics across all flows."""
-        return self._request('GET', '/analytics', params=params)
+    def _drain(self, worker: int):
+        """Worker loop: batch events per type and flush on size or age."""
+        work = self.queues[worker]
+        batches = {}
+        ordered = []  # used instead of batches when a deduplicator is attached
+        last_flush = time.monotonic()
+        
+        def add(events):
+            if self.deduplicator:
+                ordered.extend(events)
+                if len(ordered) >= self.batch_size:
+                    self._flush_in_order(ordered)
+                    ordered.clear()
+                return
+            for event in events:
+                event_type = event.get('event', 'unknown')
+                batch = batches.setdefault(event_type, [])
+                batch.append(event)
+                if len(batch) >= self.batch_size:
+                    self._flush(event_type, batches.pop(event_type))
+        
+        def flush_all():
+            self._flush_in_order(ordered)
+            ordered.clear()
+            for event_type in list(batches):
+                self._flush(event_type, batches.pop(event_type))
+        
+        while not (self._stop.is_set() and work.empty()):
+            try:
+                event = work.get(timeout=self.flush_interval)
+            except queue.Empty:
+                event = None
+            if event is not None:
+                try:
+                    add(self.deduplicator.process([event]) if self.deduplicator else [event])
+                except Exception as e:
+                    self._count('event_errors')
+                    logger.exception("Failed to process webhook event %r: %s", event, e)
+            
+            if time.monotonic() - last_flush >= self.flush_interval:
+                if self.deduplicator:
+                    add(self.deduplicator.release_expired())
+                flush_all()
+                last_flush = time.monotonic()
+        
+        if self.deduplicator:
+            add(self.deduplicator.release_expired(force=True))
+        flush_all()
 
-    # Vendor Management
-    def list_vendors(self, **params) -> Dict[str, Any]:
-        """List all configured vendors."""
-        return self._request('GET', '/vendors', params=params)
+    def start(self) -> 'WebhookReceiver':
+        """Start the worker pool."""
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._drain, args=(i,), daemon=True,
+                                          name=f"webhook-worker-{i}")
+                         for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        return self
 
-    def get_vendor_health(self, vendor_id: str) -> Dict[str, Any]:
-        """Get health status for a specific vendor."""
-        return self._request('GET', f'/vendors/{vendor_id}/health')
+    def stop(self, timeout: Optional[float] = None):
+        """Stop accepting work and let the workers drain the queue."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
 
-    # Webhook Utilities
-    def verify_webhook_signature(self, payload: str, signature: str, secret: str) -> bool:
-        """Verify webhook signature for security."""
-        expected_signature = hmac.new(
-            secret.encode('utf-8'),
-            payload.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
+    def flask_app(self, path: str = '/webhooks/flowforge'):
+        """Build a Flask app that feeds this receiver."""
+        from flask import Flask, request, jsonify
         
-        received_signature = signature.replace('sha256=', '')
-        return hmac.compare_digest(expected_signature, received_signature)
+        app = Flask(__name__)
+        
+        @app.route(path, methods=['POST'])
+        def handle_webhook():
+            status, body = self.submit(request.get_data(), request.headers.get('X-FlowForge-Signature'))
+            headers = {'Retry-After': '5'} if status == 503 else {}
+            return jsonify(body), status, headers
+        
+        return app
+
+    def aiohttp_app(self, path: str = '/webhooks/flowforge'):
+        """Build an aiohttp application that feeds this receiver asynchronously."""
+        from aiohttp import web
+        
+        async def handle_webhook(request):
+            status, body = await self.submit_async(await request.read(),
+                                                   request.headers.get('X-FlowForge-Signature'))
+            headers = {'Retry-After': '5'} if status == 503 else None
+            return web.json_response(body, status=status, headers=headers)
+        
+        app = web.Application()
+        app.router.add_post(path, handle_webhook)
+        return app
+
+
+def iter_export_rows(path: str) -> Iterator[Dict[str, str]]:
+    """Stream rows of a downloaded CSV export (optionally gzipped) one at a time."""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', newline='', encoding='utf-8') as f:
+        yield from csv.DictReader(f)
+
+
+def iter_export_chunks(path: str, chunk_rows: int = 100_000):
+    """Stream a downloaded CSV export as pandas DataFrame chunks (requires ``pandas``)."""
+    import pandas as pd
+    
+    with pd.read_csv(path, chunksize=chunk_rows) as reader:
+        yield from reader
 
 
 # Example Usage Functions
@@ -218,44 +3414,69 @@ def create_sms_marketing_flow(client: FlowForgeClient) -> str:
     return flow['id']
 
 
-def send_personalized_campaign(client: FlowForgeClient, flow_id: str, customers: List[Dict]):
-    """Send personalized messages to a list of customers."""
-    messages = []
+def send_personalized_campaign(client: FlowForgeClient, flow_id: str,
+                               customers: Iterable[Dict],
+                               journal_path: Optional[str] = None) -> BulkSendResult:
+    """Send personalized messages to a list of customers.
     
-    for customer in customers:
-        message = {
-            "recipient": customer['phone'],
-            "message": {
-                "template_id": "marketing_template",
-                "variables": {
-                    "customer_name": customer['name'],
-                    "offer_code": customer.get('offer_code', 'SAVE10'),
-                    "expiry_date": customer.get('expiry_date', '2024-12-31')
-                }
-            },
-            "metadata": {
-                "customer_id": customer['id'],
-                "campaign_id": "SUMMER_SALE_2024",
-                "user_segment": customer.get('segment', 'general')
-            }
-        }
-        messages.append(message)
+    With ``journal_path``, progress is journaled so that re-running after a
+    crash resumes where the campaign stopped instead of re-sending it.
+    """
+    # Template and campaign fields are encoded once; each customer is one row
+    encoder = BulkPayloadBuilder(
+        message={"template_id": "marketing_template"},
+        variables=("customer_name", "offer_code", "expiry_date"),
+        metadata={"campaign_id": "SUMMER_SALE_2024"},
+        metadata_fields=("customer_id", "user_segment")
+    )
+    rows = ((customer['phone'], customer['name'], customer.get('offer_code', 'SAVE10'),
+             customer.get('expiry_date', '2024-12-31'), customer['id'], customer.get('segment', 'general'))
+            for customer in customers)
     
-    # Send in batches of 100
+    # Send in batches of 100, keeping several batches in flight
     batch_size = 100
-    results = []
-    
-    for i in range(0, len(messages), batch_size):
-        batch = messages[i:i + batch_size]
-        result = client.send_bulk_messages(flow_id, batch, {
+    journal = CampaignJournal(journal_path, f"{flow_id}:SUMMER_SALE_2024") if journal_path else None
+    try:
+        result = client.send_bulk(flow_id, rows, batch_size=batch_size, encoder=encoder, journal=journal, options={
             "batch_size": batch_size,
             "rate_limit": 10,
             "callback_url": "https://your-app.com/webhooks/bulk-status"
         })
-        results.append(result)
-        print(f"Batch {i//batch_size + 1} queued: {result['batch_id']}")
+    finally:
+        if journal:
+            journal.close()
     
-    return results
+    if result.skipped:
+        print(f"Resumed campaign: {result.skipped:,} messages already sent")
+    print(f"Queued {len(result.batch_ids)} batches: {result.accepted:,} accepted, "
+          f"{result.rejected:,} rejected, {result.failed:,} failed")
+    return result
+
+
+def send_campaign_from_file(client: FlowForgeClient, flow_id: str, path: str,
+                            journal_path: Optional[str] = None) -> BulkSendResult:
+    """Send a campaign straight from a CSV/NDJSON export of any size.
+    
+    Rows are parsed lazily from the memory-mapped file; with ``journal_path``
+    a restarted run seeks past the batches already sent.
+    """
+    with RecipientFile(path, recipient='phone',
+                       variables={'customer_name': 'name', 'offer_code': 'offer_code'},
+                       metadata={'customer_id': 'id', 'user_segment': 'segment'},
+                       defaults={'offer_code': 'SAVE10', 'user_segment': 'general'}) as recipients:
+        encoder = recipients.builder({"template_id": "marketing_template"},
+                                     metadata={"campaign_id": "SUMMER_SALE_2024"})
+        journal = CampaignJournal(journal_path, f"{flow_id}:{os.path.basename(path)}") if journal_path else None
+        try:
+            result = client.send_bulk(flow_id, recipients, batch_size=500, concurrency=8,
+                                      encoder=encoder, journal=journal)
+        finally:
+            if journal:
+                journal.close()
+    
+    print(f"{path}: {result.accepted:,} accepted, {result.rejected:,} rejected, "
+          f"{result.failed:,} failed, {result.skipped:,} already sent")
+    return result
 
 
 def monitor_flow_performance(client: FlowForgeClient, flow_id: str):
@@ -285,40 +3506,72 @@ def monitor_flow_performance(client: FlowForgeClient, flow_id: str):
     return analytics
 
 
+def follow_campaign_delivery(client: FlowForgeClient, flow_id: str, message_ids: List[str],
+                             started_at: datetime, timeout: float = 3600) -> Dict[str, int]:
+    """Track delivery of a campaign's messages and tally final statuses.
+    
+    ``started_at`` is when the campaign began sending, so the listing scan
+    covers its first messages however long the send took.
+    """
+    tracker = MessageStatusTracker(client)
+    tracker.track(flow_id, message_ids, since=started_at)
+    
+    final_statuses = {}
+    for transition in tracker.watch(timeout=timeout):
+        status = transition['status']
+        if status in MessageStatusTracker.TERMINAL_STATUSES:
+            final_statuses[status] = final_statuses.get(status, 0) + 1
+        if status == 'failed':
+            print(f"Message {transition['message_id']} failed")
+    
+    print(f"Delivery summary: {final_statuses}, {tracker.pending:,} still pending")
+    return final_statuses
+
+
+def create_instrumented_client(api_key: str, span_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+    """Create a client that records per-endpoint metrics and, optionally, tracing spans."""
+    metrics = RequestMetrics()
+    instrumentation = RequestInstrumentation()
+    instrumentation.add_post_request_hook(metrics)
+    if span_callback:
+        instrumentation.add_post_request_hook(tracing_span_hook(span_callback))
+    
+    client = FlowForgeClient(api_key, instrumentation=instrumentation)
+    
+    # Serve this from your /metrics endpoint
+    def render_metrics() -> str:
+        return metrics.prometheus_text(client.connection_stats())
+    
+    return client, render_metrics
+
+
 def setup_webhook_monitoring():
     """Example Flask webhook handler for monitoring events."""
-    from flask import Flask, request, jsonify
-    
-    app = Flask(__name__)
     webhook_secret = "your-webhook-secret"
     
-    @app.route('/webhooks/flowforge', methods=['POST'])
-    def handle_webhook():
-        signature = request.headers.get('X-FlowForge-Signature')
-        payload = request.get_data(as_text=True)
-        
-        # Verify signature
-        client = FlowForgeClient('dummy-key')
-        if not client.verify_webhook_signature(payload, signature, webhook_secret):
-            return jsonify({'error': 'Invalid signature'}), 401
-        
-        event = request.get_json()
-        
+    # Drop retried deliveries so each failure alerts Slack only once
+    receiver = WebhookReceiver(webhook_secret, deduplicator=WebhookEventDeduplicator())
+    
+    @receiver.route('*')
+    def log_events(events):
         # Log all events
-        print(f"[{datetime.now()}] Webhook event: {event['event']}")
-        
-        # Handle specific events
-        if event['event'] == 'message.failed':
-            # Alert on message failures
+        for event in events:
+            print(f"[{datetime.now()}] Webhook event: {event['event']}")
+    
+    @receiver.route('message.failed')
+    def alert_failures(events):
+        # Alert on message failures
+        for event in events:
             send_alert_to_slack(f"Message failed: {event['data']['error_message']}")
-        
-        elif event['event'] == 'flow.activated':
-            # Log flow activations
+    
+    @receiver.route('flow.activated')
+    def log_activations(events):
+        # Log flow activations
+        for event in events:
             log_flow_activation(event['data'])
-        
-        return jsonify({'status': 'received'}), 200
     
-    return app
+    receiver.start()
+    return receiver.flask_app()
 
 
 def send_alert_to_slack(message: str):
@@ -341,26 +3594,14 @@ def implement_smart_routing(client: FlowForgeClient):
     vendors = client.list_vendors(channel='sms')
     healthy_vendors = [v for v in vendors['data'] if v['health']['status'] == 'healthy']
     
-    # Create routing weights based on performance
-    total_vendors = len(healthy_vendors)
-    base_weight = 100 // total_vendors
-    
-    routing_weights = []
-    for vendor in healthy_vendors:
-        # Adjust weight based on success rate and cost
-        success_rate = vendor['health']['success_rate_24h']
-        cost_factor = 1 / vendor['pricing']['cost_per_message']  # Lower cost = higher weight
-        
-        adjusted_weight = int(base_weight * (success_rate / 100) * cost_factor)
-        routing_weights.append({
-            "vendorId": vendor['id'],
-            "weight": adjusted_weight
-        })
-    
-    # Normalize weights to sum to 100
-    total_weight = sum(w['weight'] for w in routing_weights)
-    for weight in routing_weights:
-        weight['weight'] = int((weight['weight'] / total_weight) * 100)
+    # Create routing weights based on performance (lower cost = higher weight);
+    # every healthy vendor keeps a non-zero share and the weights sum to 100
+    scores = {
+        vendor['id']: (vendor['health']['success_rate_24h'] / 100) / vendor['pricing']['cost_per_message']
+        for vendor in healthy_vendors
+    }
+    routing_weights = [{"vendorId": vendor_id, "weight": weight}
+                       for vendor_id, weight in _distribute_weights(scores).items()]
     
     # Create flow with smart routing
     flow_config = {
@@ -395,22 +3636,41 @@ def implement_smart_routing(client: FlowForgeClient):
     return client.create_flow(flow_config)
 
 
-def batch_process_with_rate_limiting(client: FlowForgeClient, flow_id: str, 
-                                   recipients: List[str], rate_limit: int = 10):
-    """Process large batches with rate limiting."""
+def keep_routing_optimized(client: FlowForgeClient, flow_id: str) -> VendorWeightOptimizer:
+    """Continuously re-weight a smart-routing flow as vendor health changes."""
+    optimizer = VendorWeightOptimizer(client, flow_id, poll_interval=5.0, drift_threshold=5)
+    print(f"Optimizing routing for {flow_id} across {len(optimizer.weights)} vendors")
+    return optimizer.start()
+
+
+def send_for_tenants(pool: TenantClientPool, sends: Iterable[Tuple[str, str, Dict[str, Any]]],
+                     concurrency: int = 16) -> List[Dict[str, Any]]:
+    """Send messages on behalf of many accounts over the pool's shared connections.
     
-    def chunks(lst, n):
-        """Yield successive n-sized chunks from lst."""
-        for i in range(0, len(lst), n):
-            yield lst[i:i + n]
+    ``sends`` yields ``(api_key, flow_id, message)``; each account is paced by
+    its own rate limiter.
+    """
+    def send(item):
+        api_key, flow_id, message = item
+        return pool.client(api_key).send_message(flow_id, message)
     
-    results = []
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, sends))
     
-    for batch_num, recipient_batch in enumerate(chunks(recipients, rate_limit)):
-        print(f"Processing batch {batch_num + 1}...")
-        
-        messages = [
-            {
+    stats = pool.connection_stats()
+    print(f"{len(results)} messages for {len(pool)} tenants over {stats['connections']} connections")
+    return results
+
+
+def batch_process_with_rate_limiting(client: FlowForgeClient, flow_id: str, 
+                                   recipients: Iterable[str], rate_limit: int = 10,
+                                   concurrency: int = 4) -> BulkSendResult:
+    """Process large batches with rate limiting."""
+    
+    def build_messages():
+        for index, recipient in enumerate(recipients):
+            batch_num, i = divmod(index, rate_limit)
+            yield {
                 "recipient": recipient,
                 "message": {
                     "text": f"Hello! This is message {i+1} from batch {batch_num + 1}",
@@ -421,26 +3681,48 @@ def batch_process_with_rate_limiting(client: FlowForgeClient, flow_id: str,
                     "message_index": i
                 }
             }
-            for i, recipient in enumerate(recipient_batch)
-        ]
-        
+    
+    # The client's rate limiter paces batches to the account quota,
+    # so no fixed pause between batches is needed
+    result = client.send_bulk(flow_id, build_messages(), batch_size=rate_limit,
+                              concurrency=concurrency)
+    
+    for batch in sorted(result.batches, key=lambda b: b['index']):
+        if batch['error']:
+            print(f"Batch {batch['index'] + 1} failed: {batch['error']}")
+        else:
+            print(f"Batch {batch['index'] + 1} queued successfully: {batch['batch_id']}")
+    
+    return result
+
+
+# Report thresholds shared by the dict and columnar report pipelines
+MIN_SUCCESS_RATE = 95
+MAX_COST_PER_MESSAGE = 0.05
+
+
+def _fetch_flow_performance(client: FlowForgeClient, flow_ids: List[str], days: int,
+                            concurrency: Optional[int]) -> Iterator[Tuple[str, Optional[Dict], Any]]:
+    """Fetch each flow and its analytics concurrently.
+    
+    Yields ``(flow_id, flow_data, analytics)`` in input order, or
+    ``(flow_id, None, exception)`` for flows that could not be fetched.
+    Concurrency (16 by default) is capped at the client's ``pool_maxsize``
+    so no keep-alive connection is discarded.
+    """
+    def fetch(flow_id):
         try:
-            result = client.send_bulk_messages(flow_id, messages)
-            results.append(result)
-            print(f"Batch {batch_num + 1} queued successfully: {result['batch_id']}")
-            
-            # Wait 1 second between batches to respect rate limits
-            time.sleep(1)
-            
+            analytics = client.get_flow_analytics(flow_id, period=f'{days}d')
+            return flow_id, client.get_flow(flow_id), analytics
         except Exception as e:
-            print(f"Batch {batch_num + 1} failed: {str(e)}")
-            results.append({"error": str(e), "batch": batch_num + 1})
+            return flow_id, None, e
     
-    return results
+    with ThreadPoolExecutor(max_workers=min(concurrency or 16, client.pool_maxsize)) as pool:
+        yield from pool.map(fetch, flow_ids)
 
 
 def generate_performance_report(client: FlowForgeClient, flow_ids: List[str], 
-                              days: int = 7) -> Dict[str, Any]:
+                              days: int = 7, concurrency: Optional[int] = None) -> Dict[str, Any]:
     """Generate a comprehensive performance report."""
     
     report = {
@@ -455,51 +3737,209 @@ def generate_performance_report(client: FlowForgeClient, flow_ids: List[str],
         }
     }
     
-    total_success_rates = []
+    successful_messages = 0
     
-    for flow_id in flow_ids:
-        try:
-            analytics = client.get_flow_analytics(flow_id, period=f'{days}d')
-            flow_data = client.get_flow(flow_id)
-            
-            flow_report = {
-                "flow_id": flow_id,
-                "name": flow_data['name'],
-                "channel": flow_data['channel'],
-                "status": flow_data['status'],
-                "metrics": analytics['summary'],
-                "vendor_performance": analytics['vendor_breakdown'],
-                "recommendations": []
-            }
-            
-            # Add recommendations based on performance
-            if analytics['summary']['success_rate'] < 95:
-                flow_report['recommendations'].append(
-                    "Consider reviewing vendor configuration - success rate below 95%"
-                )
-            
-            if analytics['summary']['avg_cost_per_message'] > 0.05:
-                flow_report['recommendations'].append(
-                    "High cost per message - review vendor pricing and routing weights"
-                )
-            
-            report['flows'].append(flow_report)
-            
-            # Update summary
-            report['summary']['total_messages'] += analytics['summary']['total_messages']
-            report['summary']['total_cost'] += analytics['summary']['total_cost']
-            total_success_rates.append(analytics['summary']['success_rate'])
-            
-        except Exception as e:
-            print(f"Failed to get analytics for flow {flow_id}: {str(e)}")
+    for flow_id, flow_data, analytics in _fetch_flow_performance(client, flow_ids, days, concurrency):
+        if flow_data is None:
+            print(f"Failed to get analytics for flow {flow_id}: {str(analytics)}")
+            continue
+        
+        summary = analytics['summary']
+        flow_report = {
+            "flow_id": flow_id,
+            "name": flow_data['name'],
+            "channel": flow_data['channel'],
+            "status": flow_data['status'],
+            "metrics": summary,
+            "vendor_performance": analytics['vendor_breakdown'],
+            "recommendations": []
+        }
+        
+        # Add recommendations based on performance
+        if summary['success_rate'] < MIN_SUCCESS_RATE:
+            flow_report['recommendations'].append(
+                "Consider reviewing vendor configuration - success rate below 95%"
+            )
+        
+        if summary['avg_cost_per_message'] > MAX_COST_PER_MESSAGE:
+            flow_report['recommendations'].append(
+                "High cost per message - review vendor pricing and routing weights"
+            )
+        
+        report['flows'].append(flow_report)
+        
+        # Update summary
+        report['summary']['total_messages'] += summary['total_messages']
+        report['summary']['total_cost'] += summary['total_cost']
+        successful_messages += summary['total_messages'] * summary['success_rate'] / 100
     
-    # Calculate averages
-    if total_success_rates:
-        report['summary']['avg_success_rate'] = sum(total_success_rates) / len(total_success_rates)
+    # Weight the success rate by message volume rather than averaging per-flow rates
+    if report['summary']['total_messages']:
+        report['summary']['avg_success_rate'] = (
+            successful_messages / report['summary']['total_messages'] * 100
+        )
     
     return report
 
 
+def build_performance_frames(client: FlowForgeClient, flow_ids: List[str],
+                             days: int = 7, concurrency: Optional[int] = None):
+    """Load per-flow summaries and vendor breakdowns into pandas DataFrames.
+    
+    Requires ``pandas``. Returns ``(flows, vendors)`` with one row per flow
+    and one row per flow/vendor pair respectively.
+    """
+    import pandas as pd
+    
+    flow_columns = {k: [] for k in ('flow_id', 'name', 'channel', 'status', 'total_messages',
+                                    'success_rate', 'total_cost', 'avg_cost_per_message')}
+    vendor_columns = {k: [] for k in ('flow_id', 'vendor_id', 'messages', 'success_rate',
+                                      'avg_cost', 'total_cost')}
+    
+    for flow_id, flow_data, analytics in _fetch_flow_performance(client, flow_ids, days, concurrency):
+        if flow_data is None:
+            print(f"Failed to get analytics for flow {flow_id}: {str(analytics)}")
+            continue
+        
+        row = dict(analytics['summary'], flow_id=flow_id, name=flow_data.get('name'),
+                   channel=flow_data.get('channel'), status=flow_data.get('status'))
+        for column, values in flow_columns.items():
+            values.append(row.get(column))
+        
+        for vendor in analytics.get('vendor_breakdown', []):
+            vendor_columns['flow_id'].append(flow_id)
+            for column in ('vendor_id', 'messages', 'success_rate', 'avg_cost', 'total_cost'):
+                vendor_columns[column].append(vendor.get(column))
+    
+    return pd.DataFrame(flow_columns), pd.DataFrame(vendor_columns)
+
+
+def analyze_performance_frames(flows, vendors,
+                               percentiles: Tuple[float, ...] = (0.5, 0.9, 0.99)) -> Dict[str, Any]:
+    """Compute volume-weighted rates, vendor cost percentiles and recommendations.
+    
+    Operates column-wise on the frames from ``build_performance_frames`` and
+    adds a ``recommendations`` column to ``flows`` in place.
+    """
+    import numpy as np
+    import pandas as pd
+    
+    volume = flows['total_messages'].to_numpy(dtype=float)
+    total_messages = volume.sum()
+    
+    low_success = flows['success_rate'].to_numpy(dtype=float) < MIN_SUCCESS_RATE
+    high_cost = flows['avg_cost_per_message'].to_numpy(dtype=float) > MAX_COST_PER_MESSAGE
+    flows['recommendations'] = np.char.add(
+        np.where(low_success, "Consider reviewing vendor configuration - success rate below 95%; ", ""),
+        np.where(high_cost, "High cost per message - review vendor pricing and routing weights", "")
+    )
+    flows['recommendations'] = flows['recommendations'].str.rstrip('; ')
+    
+    vendor_volume = vendors['messages'].astype(float)
+    vendor_summary = vendors.assign(
+        successful=vendor_volume * vendors['success_rate'] / 100
+    ).groupby('vendor_id').agg(
+        messages=('messages', 'sum'),
+        successful=('successful', 'sum'),
+        total_cost=('total_cost', 'sum')
+    )
+    vendor_summary['success_rate'] = vendor_summary['successful'] / vendor_summary['messages'] * 100
+    vendor_summary['avg_cost'] = vendor_summary['total_cost'] / vendor_summary['messages']
+    percentile_columns = [f"avg_cost_p{round(q * 100)}" for q in percentiles]
+    if vendors.empty:
+        # New or draft flows have no vendor breakdown yet; unstack would yield no columns
+        cost_percentiles = pd.DataFrame(columns=percentile_columns, index=vendor_summary.index, dtype=float)
+    else:
+        cost_percentiles = vendors.groupby('vendor_id')['avg_cost'].quantile(list(percentiles)).unstack()
+        cost_percentiles.columns = percentile_columns
+    
+    return {
+        "total_messages": int(total_messages),
+        "total_cost": float(flows['total_cost'].sum()),
+        "success_rate": float(np.average(flows['success_rate'], weights=volume)) if total_messages else 0.0,
+        "flows_needing_attention": int((low_success | high_cost).sum()),
+        "vendors": vendor_summary.drop(columns='successful').join(cost_percentiles)
+    }
+
+
+def export_performance_frames(flows, vendors, path_prefix: str, fmt: str = 'parquet') -> List[str]:
+    """Write report frames for BI tools as Parquet (requires ``pyarrow``) or CSV."""
+    paths = []
+    for name, frame in (('flows', flows), ('vendors', vendors)):
+        path = f"{path_prefix}_{name}.{fmt}"
+        if fmt == 'parquet':
+            frame.to_parquet(path, index=False)
+        elif fmt == 'csv':
+            frame.to_csv(path, index=False)
+        else:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        paths.append(path)
+    return paths
+
+
+def nightly_cost_reconciliation(client: FlowForgeClient, flow_ids: List[str],
+                                path: str = 'analytics_export.csv') -> Dict[str, float]:
+    """Export a week of analytics and total cost per vendor in constant memory."""
+    export = client.export_analytics({
+        "flows": flow_ids,
+        "period": "7d",
+        "format": "csv",
+        "metrics": ["messages_sent", "success_rate", "cost_per_message"]
+    })
+    export_id = export['export_id']
+    export = client.wait_for_export(export_id)
+    client.download_export(export['download_url'], path, export_id=export_id)
+    
+    cost_by_vendor = {}
+    for row in iter_export_rows(path):
+        vendor = row.get('vendor_id', 'unknown')
+        cost_by_vendor[vendor] = cost_by_vendor.get(vendor, 0.0) + float(row.get('total_cost') or 0)
+    
+    for vendor, cost in sorted(cost_by_vendor.items()):
+        print(f"  {vendor}: ${cost:,.2f}")
+    return cost_by_vendor
+
+
+def validate_flow_offline(flow_config: Dict[str, Any], scenarios: List[Dict[str, Any]],
+                          expected_vendors: List[Optional[str]], processes: int = 4) -> bool:
+    """Check routing for a regression suite locally before calling create_flow."""
+    errors = _openapi_flow_validator().validate(flow_config['configuration'])
+    if errors:
+        print("Flow configuration is invalid:\n  " + "\n  ".join(errors))
+        return False
+    
+    simulator = FlowSimulator(flow_config['configuration'])
+    results = simulator.run_batch(scenarios, processes=processes)
+    
+    mismatches = 0
+    for scenario, result, expected in zip(scenarios, results, expected_vendors):
+        if result['selected_vendor'] != expected:
+            mismatches += 1
+            print(f"Scenario {scenario.get('message_id')}: expected {expected}, "
+                  f"got {result['selected_vendor']} via {' -> '.join(result['path'])}")
+    
+    print(f"{len(scenarios) - mismatches}/{len(scenarios)} routing scenarios passed")
+    return mismatches == 0
+
+
+async def poll_message_statuses(client: AsyncFlowForgeClient,
+                                message_ids: List[str]) -> Dict[str, str]:
+    """Look up the status of many messages concurrently from one event loop."""
+    results = await asyncio.gather(
+        *(client.get_message_status(message_id) for message_id in message_ids),
+        return_exceptions=True
+    )
+    
+    statuses = {}
+    for message_id, result in zip(message_ids, results):
+        if isinstance(result, Exception):
+            print(f"Status lookup failed for {message_id}: {str(result)}")
+            continue
+        statuses[message_id] = result['status']
+    
+    return statuses
+
+
 # Main execution example
 def main():
     """Main example demonstrating various API operations."""